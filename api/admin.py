@@ -1,5 +1,14 @@
 from django.contrib import admin
 
-from .models import CustomUser
+from .models import CustomUser, OutboxEmail
 
 admin.site.register(CustomUser)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    # Текст письма с кодом подтверждения в админке не показываем.
+    exclude = ('body',)
+    list_display = ('to', 'subject', 'status', 'attempts', 'created',
+                    'sent_at')
+    list_filter = ('status',)
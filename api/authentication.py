@@ -0,0 +1,71 @@
+"""JWT-аутентификация без запроса пользователя к базе.
+
+Токены, выданные MyTokenObtainPairSerializer, несут роль и флаги
+пользователя; по ним собирается RoleTokenUser, которого хватает
+пермишенам. Версия токена сверяется с CustomUser.token_version через
+кеш: смена роли или блокировка увеличивают версию, и старые токены
+перестают приниматься. Ключ кеша включает версию ресурса users из
+таблицы ResourceVersion (см. api.cache), поэтому отзыв токена виден
+всем процессам сразу, даже с локальным кешем у каждого из них.
+Токены без этих claim'ов (например, созданные RefreshToken.for_user)
+обрабатываются как раньше — с загрузкой из базы.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_version
+from .models import CustomUser
+
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_VERSION_KEY = 'token_version:{}:{}'
+# Версия недействительного (удалённого или заблокированного) пользователя.
+REVOKED = -1
+USER_CLAIMS = ('role', 'username', 'is_staff', 'is_superuser')
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def get_token_version(user_id):
+    key = TOKEN_VERSION_KEY.format(user_id, get_version('users'))
+    version = cache.get(key)
+    if version is None:
+        row = CustomUser.objects.filter(pk=user_id).values_list(
+            'token_version', 'is_active').first()
+        version = row[0] if row and row[1] else REVOKED
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def load_user(user):
+    """Полная модель пользователя для эндпоинтов, которым нужен профиль."""
+    if isinstance(user, CustomUser):
+        return user
+    return CustomUser.objects.get(pk=user.pk)
+
+
+class RoleTokenUser(TokenUser):
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token[TOKEN_VERSION_CLAIM] != get_token_version(user_id):
+            raise AuthenticationFailed(_('Token is outdated'),
+                                       code='token_outdated')
+        return RoleTokenUser(validated_token)
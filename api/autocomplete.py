@@ -0,0 +1,131 @@
+"""Префиксный индекс для подсказок по произведениям, жанрам и категориям.
+
+Индекс живёт в памяти процесса: отсортированный массив ключей (каждое
+слово названия и всё, что за ним, в casefold) и параллельный массив
+рангов записей, где ранг — место записи в порядке (-weight, name).
+Совпадения по префиксу — один непрерывный диапазон ключей; дерево
+отрезков с минимумом ранга над ним отдаёт лучшие k записей диапазона
+за O(k log n), без просмотра всех совпадений. Индекс помнит версии
+ресурсов (api.cache), на которых построен, и перестраивается при первом
+запросе после их смены сигналами.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.db.models import Count
+
+from .cache import get_version
+from .search import WORD_RE
+
+RESOURCES = ('titles', 'genres', 'categories')
+
+Entry = namedtuple('Entry', 'type id slug name weight')
+
+
+def word_keys(name):
+    """Ключи для каждого слова: «Побег из Шоушенка» -> ..., «шоушенка»."""
+    folded = name.casefold()
+    return {folded[match.start():] for match in WORD_RE.finditer(folded)}
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        # Номер записи в self.entries и есть её ранг.
+        self.entries = sorted(entries,
+                              key=lambda entry: (-entry.weight, entry.name))
+        pairs = sorted(
+            (key, rank)
+            for rank, entry in enumerate(self.entries)
+            for key in word_keys(entry.name)
+        )
+        self.keys = [key for key, _ in pairs]
+        # Дерево отрезков снизу вверх: листья tree[size:] — ранги ключей,
+        # узел i — минимум своих детей 2i и 2i + 1.
+        self.size = len(pairs)
+        self.tree = [0] * self.size + [rank for _, rank in pairs]
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = min(self.tree[2 * node],
+                                  self.tree[2 * node + 1])
+
+    def prefix_range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\U0010ffff', start)
+        return start, end
+
+    def cover(self, start, end):
+        """Узлы дерева, листья которых ровно покрывают [start, end)."""
+        start += self.size
+        end += self.size
+        while start < end:
+            if start & 1:
+                yield start
+                start += 1
+            if end & 1:
+                end -= 1
+                yield end
+            start //= 2
+            end //= 2
+
+    def search(self, query, limit):
+        prefix = query.casefold().strip()
+        if not prefix:
+            return []
+        heap = [(self.tree[node], node)
+                for node in self.cover(*self.prefix_range(prefix))]
+        heapq.heapify(heap)
+        found = []
+        # Узлы достаются по возрастанию минимального ранга, поэтому листья
+        # выходят в порядке ранга; одна запись может совпасть несколькими
+        # словами, повторы пропускаются.
+        while heap and len(found) < limit:
+            rank, node = heapq.heappop(heap)
+            if node >= self.size:
+                if not found or found[-1] != rank:
+                    found.append(rank)
+                continue
+            for child in (2 * node, 2 * node + 1):
+                heapq.heappush(heap, (self.tree[child], child))
+        return [self.entries[rank] for rank in found]
+
+
+def load_entries(batch_size=5000):
+    from .models import Category, Genre, Title
+
+    entries = []
+    for model, kind in ((Category, 'category'), (Genre, 'genre')):
+        rows = model.objects.annotate(weight=Count('titles')).values_list(
+            'slug', 'name', 'weight').order_by()
+        entries += [Entry(kind, None, slug, name, weight)
+                    for slug, name, weight in rows]
+    rows = Title.objects.values_list('pk', 'name', 'rating_count')
+    entries += [Entry('title', pk, None, name, weight)
+                for pk, name, weight in rows.iterator(chunk_size=batch_size)]
+    return entries
+
+
+_index = None
+_index_versions = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _index_versions
+    versions = tuple(get_version(resource) for resource in RESOURCES)
+    if _index is not None and versions == _index_versions:
+        return _index
+    # Пока один поток перестраивает индекс, остальные отвечают по старому.
+    if not _lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _index is None or versions != _index_versions:
+            _index = PrefixIndex(load_entries())
+            _index_versions = versions
+    finally:
+        _lock.release()
+    return _index
+
+
+def suggest(query, limit=10):
+    return get_index().search(query, limit)
@@ -0,0 +1,127 @@
+"""Версии ресурсов для кеша ответов, кеша count и ETag.
+
+Версии хранятся в таблице ResourceVersion: локальный кеш у каждого
+процесса свой, а ключи и валидаторы, построенные из версий в базе,
+меняются во всех процессах сразу после записи. Внутри HTTP-запроса
+версии читаются одним запросом и запоминаются до его конца.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+RESOURCES = ('titles', 'genres', 'categories', 'reviews', 'comments',
+             'users')
+
+_local = threading.local()
+
+
+def initial_version():
+    # Если строку версии удалили, новое значение не совпадёт ни с одной
+    # из прежних версий, и старые записи кеша не оживут.
+    return time.time_ns()
+
+
+def create_versions(existing=()):
+    """Создаёт недостающие строки версий и возвращает их значения.
+
+    Строки создаёт миграция; здесь они появляются заново только после
+    очистки таблицы. Если строку одновременно создал другой процесс,
+    его значение просто не совпадёт с нашим — это лишний промах кеша.
+    """
+    from .models import ResourceVersion
+
+    now = timezone.now()
+    rows = [ResourceVersion(resource=resource, version=initial_version(),
+                            modified=now)
+            for resource in RESOURCES if resource not in existing]
+    ResourceVersion.objects.bulk_create(rows, ignore_conflicts=True)
+    return {row.resource: (row.version, now.timestamp()) for row in rows}
+
+
+def load_versions():
+    """{ресурс: (версия, время изменения в unix time)}."""
+    versions = getattr(_local, 'versions', None)
+    if versions is not None:
+        return versions
+    from .models import ResourceVersion
+
+    rows = ResourceVersion.objects.values_list('resource', 'version',
+                                               'modified')
+    versions = {resource: (version, modified.timestamp())
+                for resource, version, modified in rows}
+    if len(versions) < len(RESOURCES):
+        versions.update(create_versions(versions))
+    if getattr(_local, 'in_request', False):
+        _local.versions = versions
+    return versions
+
+
+def get_version(resource):
+    return load_versions()[resource][0]
+
+
+def get_last_modified(resource):
+    """Время последнего изменения ресурса (unix time)."""
+    return load_versions()[resource][1]
+
+
+def bump_version(resource):
+    """Поднимает версию ресурса после фиксации текущей транзакции.
+
+    Все отметки одной транзакции, например каскадного удаления,
+    записываются одним UPDATE. Отметки отменённой транзакции уйдут
+    со следующей записью: лишняя смена версии только сбрасывает кеш.
+    """
+    pending = _local.__dict__.setdefault('pending', set())
+    pending.add(resource)
+    transaction.on_commit(write_versions)
+
+
+def write_versions():
+    from .models import ResourceVersion
+
+    pending = getattr(_local, 'pending', None)
+    if not pending:
+        return
+    resources = sorted(pending)
+    pending.clear()
+    _local.versions = None
+    updated = ResourceVersion.objects.filter(resource__in=resources).update(
+        version=F('version') + 1, modified=timezone.now())
+    if updated < len(resources):
+        create_versions(ResourceVersion.objects.values_list('resource',
+                                                            flat=True))
+
+
+def bump_all_versions():
+    for resource in RESOURCES:
+        bump_version(resource)
+
+
+@receiver(request_started)
+def start_request(sender, **kwargs):
+    _local.in_request = True
+    _local.versions = None
+
+
+@receiver(request_finished)
+def finish_request(sender, **kwargs):
+    _local.in_request = False
+    _local.versions = None
+
+
+def params_digest(params, ignore=()):
+    """Хеш query-параметров, не зависящий от их порядка."""
+    items = sorted(
+        (name, value)
+        for name in params if name not in ignore
+        for value in params.getlist(name)
+    )
+    return hashlib.md5(urlencode(items).encode()).hexdigest()
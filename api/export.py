@@ -0,0 +1,107 @@
+"""Выгрузка каталога в NDJSON: произведения, отзывы и комментарии.
+
+Каждая строка — JSON-объект с полем type. Таблицы читаются через
+iterator(chunk_size), а жанры — одним запросом на пачку произведений,
+поэтому память не зависит от размера каталога. updated_since
+ограничивает выгрузку записями с updated_at не раньше отметки;
+изменение жанров и категории сдвигает updated_at их произведений
+(api.signals.touch_titles). Отметку для следующего запуска нужно брать
+до начала чтения (см. ExportView и команду export_catalog): записи,
+изменённые во время выгрузки, придут повторно, но не потеряются.
+Удаления в выгрузку не попадают.
+"""
+import re
+import zlib
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .management.utils import batches
+from .models import Comment, Review, Title
+from .renderers import dumps
+from .serializers import represent_titles, title_values
+
+CHUNK_SIZE = 2000
+GZIP_RE = re.compile(r'\bgzip\b')
+REVIEW_VALUES = ('id', 'title_id', 'author__username', 'text', 'score',
+                 'pub_date', 'comment_count', 'updated_at')
+COMMENT_VALUES = ('id', 'review_id', 'author__username', 'text',
+                  'pub_date', 'updated_at')
+
+
+def parse_watermark(value):
+    """ISO 8601 -> aware datetime; ValueError, если не разобрать.
+
+    Дата без времени означает полночь в текущем часовом поясе.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def changed(queryset, updated_since):
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    return queryset.order_by('pk')
+
+
+def export_titles(updated_since, chunk_size):
+    rows = title_values(changed(Title.objects.all(), updated_since),
+                        extra=('updated_at',))
+    for chunk in batches(rows.iterator(chunk_size=chunk_size), chunk_size):
+        for row, data in zip(chunk, represent_titles(chunk)):
+            yield {'type': 'title', **data, 'updated_at': row['updated_at']}
+
+
+def export_reviews(updated_since, chunk_size):
+    rows = changed(Review.objects.all(), updated_since).values_list(
+        *REVIEW_VALUES)
+    for (pk, title_id, author, text, score, pub_date, comment_count,
+         updated_at) in rows.iterator(chunk_size=chunk_size):
+        yield {'type': 'review', 'id': pk, 'title': title_id,
+               'author': author, 'text': text, 'score': score,
+               'pub_date': pub_date, 'comment_count': comment_count,
+               'updated_at': updated_at}
+
+
+def export_comments(updated_since, chunk_size):
+    rows = changed(Comment.objects.all(), updated_since).values_list(
+        *COMMENT_VALUES)
+    for pk, review_id, author, text, pub_date, updated_at in (
+            rows.iterator(chunk_size=chunk_size)):
+        yield {'type': 'comment', 'id': pk, 'review': review_id,
+               'author': author, 'text': text, 'pub_date': pub_date,
+               'updated_at': updated_at}
+
+
+def export_records(updated_since=None, chunk_size=CHUNK_SIZE):
+    yield from export_titles(updated_since, chunk_size)
+    yield from export_reviews(updated_since, chunk_size)
+    yield from export_comments(updated_since, chunk_size)
+
+
+def export_ndjson(updated_since=None, chunk_size=CHUNK_SIZE):
+    """NDJSON кусками bytes по chunk_size записей."""
+    for chunk in batches(export_records(updated_since, chunk_size),
+                         chunk_size):
+        yield b''.join(dumps(record) + b'\n' for record in chunk)
+
+
+def gzip_stream(blocks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(request):
+    return bool(GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
@@ -0,0 +1,84 @@
+"""Счётчики фасетов для /titles/?facets=genre,category,year.
+
+Каждый фасет — один GROUP BY по произведениям текущей выборки, причём
+фильтр самого фасета не применяется: выбрав «Драму», клиент по-прежнему
+видит, сколько произведений дадут соседние жанры. Результат кешируется
+до смены версии 'titles', так что на горячих выборках запросов нет.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from .cache import get_version, params_digest
+from .models import Title
+
+FACETS = ('genre', 'category', 'year')
+CACHE_TIMEOUT = 300
+# Параметры, не влияющие на выборку.
+IGNORED_PARAMS = ('limit', 'offset', 'count', 'format', 'fields', 'stream',
+                  'facets', 'pagination', 'cursor', 'ordering')
+
+
+def parse_facets(value):
+    """'genre, year' -> ['genre', 'year']; ValueError с неизвестными."""
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(names).difference(FACETS))
+    if unknown:
+        raise ValueError(unknown)
+    return [name for name in FACETS if name in names]
+
+
+def genre_counts(title_ids):
+    rows = Title.genre.through.objects.filter(
+        title_id__in=title_ids
+    ).values('genre__slug', 'genre__name').annotate(
+        count=Count('title_id')
+    ).order_by('-count', 'genre__name')
+    return [{'slug': row['genre__slug'], 'name': row['genre__name'],
+             'count': row['count']} for row in rows]
+
+
+def category_counts(title_ids):
+    rows = Title.objects.filter(
+        pk__in=title_ids, category__isnull=False
+    ).values('category__slug', 'category__name').annotate(
+        count=Count('pk')
+    ).order_by('-count', 'category__name')
+    return [{'slug': row['category__slug'], 'name': row['category__name'],
+             'count': row['count']} for row in rows]
+
+
+def year_counts(title_ids):
+    rows = Title.objects.filter(
+        pk__in=title_ids, year__isnull=False
+    ).values('year').annotate(count=Count('pk')).order_by('-year')
+    return [{'value': row['year'], 'count': row['count']} for row in rows]
+
+
+COUNTERS = {
+    'genre': genre_counts,
+    'category': category_counts,
+    'year': year_counts,
+}
+# Параметры фильтра каждого фасета: все они не применяются к его счётчикам.
+DIMENSIONS = {
+    'genre': ('genre', 'genre_match'),
+    'category': ('category',),
+    'year': ('year', 'year_min', 'year_max'),
+}
+
+
+def facet_counts(name, params, get_queryset):
+    """Счётчики фасета name; get_queryset(params) — выборка без него."""
+    key = 'facets:{}:{}:{}'.format(
+        name, get_version('titles'),
+        params_digest(params, IGNORED_PARAMS + DIMENSIONS[name])
+    )
+    counts = cache.get(key)
+    if counts is None:
+        params = params.copy()
+        for param in DIMENSIONS[name]:
+            params.pop(param, None)
+        title_ids = get_queryset(params).order_by().values('pk')
+        counts = COUNTERS[name](title_ids)
+        cache.set(key, counts, CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,34 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkSlugManyRelatedField(serializers.ManyRelatedField):
+    """Список slug -> объекты одним запросом вместо запроса на каждый."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = [str(item) for item in data]
+        found = {
+            str(getattr(instance, child.slug_field)): instance
+            for instance in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': slugs})
+        }
+        for slug in slugs:
+            if slug not in found:
+                child.fail('does_not_exist', slug_name=child.slug_field,
+                           value=slug)
+        return [found[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkSlugManyRelatedField(**list_kwargs)
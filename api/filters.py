@@ -1,14 +1,40 @@
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
 from .models import Title
+from .search import search_titles
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Несколько значений через запятую: ``?category=films,books``."""
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
+    """Фильтры списка произведений.
+
+    Страница в порядке id читается по индексу с year, одной category,
+    genre (подзапрос по связи) и name (проверяется по ходу чтения).
+    Без такого индекса — year_min/year_max и несколько категорий:
+    найденное сортируется во временном B-дереве либо таблица читается
+    подряд с проверкой условия. Их перечисляет unindexed_params(),
+    а tests/test_25_query_plans.py сверяет список с планами запросов.
+    """
+    GENRE_MATCH_CHOICES = (
+        ('any', 'Любой из жанров'),
+        ('all', 'Все жанры'),
+    )
+
+    category = CharInFilter(
         field_name='category__slug',
+        lookup_expr='in',
+    )
+    genre = CharInFilter(
+        method='filter_genre',
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
+    genre_match = filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES,
+        method='filter_genre_match',
     )
     name = filters.CharFilter(
         field_name='name',
@@ -17,6 +43,14 @@ class TitleFilter(filters.FilterSet):
     year = filters.NumberFilter(
         field_name='year',
     )
+    year_min = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte',
+    )
+    year_max = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte',
+    )
 
     class Meta:
         model = Title
@@ -24,6 +58,133 @@ class TitleFilter(filters.FilterSet):
         fields = (
             'category',
             'genre',
+            'genre_match',
             'year',
+            'year_min',
+            'year_max',
             'name',
         )
+
+    @staticmethod
+    def unindexed_params(params):
+        """Параметры выборки, под которые нет индекса в порядке id."""
+        names = [name for name in ('year_min', 'year_max')
+                 if str(params.get(name, '')).strip()]
+        categories = str(params.get('category', '')).split(',')
+        if len([slug for slug in categories if slug.strip()]) > 1:
+            names.append('category')
+        return names
+
+    @staticmethod
+    def genre_titles(slugs):
+        return Title.genre.through.objects.filter(
+            genre__slug__in=slugs
+        ).values('title_id')
+
+    def filter_genre(self, queryset, name, value):
+        # pk IN (подзапрос) вместо JOIN: без дублей и без сортировки
+        # результата во временном B-дереве. Для ?genre_match=all —
+        # по подзапросу на жанр, всё в одном запросе.
+        slugs = [slug for slug in value if slug]
+        if not slugs:
+            return queryset
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            for slug in slugs:
+                queryset = queryset.filter(pk__in=self.genre_titles([slug]))
+            return queryset
+        return queryset.filter(pk__in=self.genre_titles(slugs))
+
+    def filter_genre_match(self, queryset, name, value):
+        # Учитывается в filter_genre().
+        return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """``?search=`` по названию и описанию с сортировкой по релевантности."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_titles(queryset, query)
+
+
+def reverse_term(term):
+    return term[1:] if term.startswith('-') else '-' + term
+
+
+class TitleOrderingFilter(BaseFilterBackend):
+    """``?ordering=rating,-year,name``: только сортировки с индексом.
+
+    Допустимы наборы полей из orderings и они же с обратным направлением
+    всех полей. В конец добавляется id в направлении последнего поля:
+    порядок однозначен и целиком совпадает с составным индексом Title,
+    так что страница читается по индексу без сортировки таблицы. Из
+    фильтров с ordering сочетаются только одна категория (индексы
+    category_id + сортировка) и name (проверяется по ходу чтения
+    индекса); остальные отбирали бы строки, которые пришлось бы
+    сортировать целиком, поэтому такие запросы получают 400. Без
+    параметра порядок задаёт queryset (id или релевантность поиска).
+    """
+    ordering_param = 'ordering'
+    default_ordering = ('id',)
+    # Публичное имя -> колонка Title.
+    ordering_fields = {
+        'name': 'name',
+        'rating': 'rating_avg',
+        'review_count': 'rating_count',
+        'year': 'year',
+    }
+    # Под каждой сортировкой — индекс Title с теми же направлениями.
+    orderings = (
+        ('name',),
+        ('rating',),
+        ('review_count',),
+        ('year',),
+        ('rating', '-year', 'name'),
+    )
+    # Фильтры, с которыми у сортировок нет индекса, сверх
+    # TitleFilter.unindexed_params().
+    unindexed_filters = ('genre', 'year', 'search')
+
+    def get_terms(self, request):
+        value = request.query_params.get(self.ordering_param, '')
+        return [term.strip() for term in value.split(',') if term.strip()]
+
+    def get_ordering(self, request, queryset=None, view=None):
+        """Колонки для order_by(); его же берёт курсорная пагинация."""
+        terms = self.get_terms(request)
+        if not terms:
+            return list(self.default_ordering)
+        canonical = tuple(terms if not terms[0].startswith('-')
+                          else map(reverse_term, terms))
+        if canonical not in self.orderings:
+            raise ValidationError({self.ordering_param: [
+                'Недопустимая сортировка. Доступны: {} и они же с '
+                'обратным направлением всех полей.'.format('; '.join(
+                    ','.join(ordering) for ordering in self.orderings))
+            ]})
+        self.check_filters(request)
+        ordering = []
+        for term in terms:
+            prefix = '-' if term.startswith('-') else ''
+            ordering.append(prefix + self.ordering_fields[term.lstrip('-')])
+        return ordering + [prefix + 'id']
+
+    def check_filters(self, request):
+        params = request.query_params
+        unsupported = {name for name in self.unindexed_filters
+                       if params.get(name, '').strip()}
+        unsupported.update(TitleFilter.unindexed_params(params))
+        if unsupported:
+            raise ValidationError({self.ordering_param: [
+                'Сортировка недоступна с фильтрами: {}. Вместе с ordering '
+                'можно фильтровать по одной категории и по name.'.format(
+                    ', '.join(sorted(unsupported)))
+            ]})
+
+    def filter_queryset(self, request, queryset, view):
+        if not self.get_terms(request):
+            return queryset
+        return queryset.order_by(*self.get_ordering(request))
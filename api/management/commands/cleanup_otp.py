@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import otp
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные коды подтверждения одним запросом.'
+
+    def handle(self, *args, **options):
+        deleted = otp.delete_expired()
+        self.stdout.write(self.style.SUCCESS(f'Удалено кодов: {deleted}'))
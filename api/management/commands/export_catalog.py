@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает произведения, отзывы и комментарии в NDJSON '
+            '(как GET /api/v1/export/).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='Файл для выгрузки, по умолчанию stdout.')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжать выгрузку gzip (только в файл).')
+        parser.add_argument(
+            '--updated-since',
+            help='Только записи, изменённые не раньше этой отметки '
+                 '(ISO 8601; дата без времени — с полуночи).'
+        )
+        parser.add_argument('--chunk-size', type=int,
+                            default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = export.parse_watermark(
+                    options['updated_since'])
+            except ValueError:
+                raise CommandError('--updated-since: ожидаются дата или дата '
+                                   'и время в формате ISO 8601')
+        if options['gzip'] and options['output'] == '-':
+            raise CommandError('--gzip требует --output')
+
+        watermark = timezone.now()
+        content = export.export_ndjson(updated_since, options['chunk_size'])
+        if options['output'] == '-':
+            for block in content:
+                self.stdout.write(block.decode(), ending='')
+            out = self.stderr
+        else:
+            if options['gzip']:
+                content = export.gzip_stream(content)
+            with open(options['output'], 'wb') as output:
+                for block in content:
+                    output.write(block)
+            out = self.stdout
+        out.write(self.style.SUCCESS(
+            f'Отметка для следующей выгрузки: {watermark.isoformat()}'
+        ))
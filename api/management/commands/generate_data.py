@@ -0,0 +1,215 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api import ranking, search
+from api.cache import bump_all_versions
+from api.models import (SCORE_FIELDS, Category, Comment, CustomUser, Genre,
+                        Review, Title, score_field)
+
+from ..utils import batches, keep_pub_date, reset_sequences
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+
+
+def zipf_norm(count, exponent):
+    return sum(rank ** -exponent for rank in range(1, count + 1))
+
+
+class Command(BaseCommand):
+    help = ('Генерирует синтетический каталог для нагрузочного '
+            'тестирования. Популярность произведений распределена по Ципфу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument(
+            '--reviews-per-title', type=float, default=10,
+            help='Среднее число отзывов на произведение.'
+        )
+        parser.add_argument(
+            '--comments-per-review', type=float, default=1,
+            help='Среднее число комментариев на отзыв.'
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.0,
+            help='Показатель распределения Ципфа для числа отзывов; '
+                 '0 — равномерно.'
+        )
+        parser.add_argument('--genres-per-title', type=int, default=3)
+        parser.add_argument('--description-length', type=int, default=200)
+        parser.add_argument('--days', type=int, default=365,
+                            help='Глубина дат публикации в днях.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['titles'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь '
+                               'и одно произведение')
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        self.user_ids = self.create_users()
+        self.genre_ids = self.create_named(Genre, 'genre',
+                                           options['genres'])
+        self.category_ids = self.create_named(Category, 'category',
+                                              options['categories'])
+        self.title_ids = self.create_titles()
+        reviews, comments = self.create_reviews()
+        reset_sequences([CustomUser, Genre, Category, Title,
+                         Title.genre.through, Review, Comment])
+        search.rebuild_index()
+        ranking.rebuild(self.batch_size)
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(self.user_ids)}, '
+            f'произведений {len(self.title_ids)}, '
+            f'отзывов {reviews}, комментариев {comments}'
+        ))
+
+    def bulk_create(self, model, objects):
+        with transaction.atomic(), keep_pub_date(model):
+            for batch in batches(objects, self.batch_size):
+                model.objects.bulk_create(batch)
+
+    def random_date(self, after=None):
+        start = after or self.now - timedelta(days=self.options['days'])
+        seconds = max(int((self.now - start).total_seconds()), 1)
+        return start + timedelta(seconds=self.random.randrange(seconds),
+                                 microseconds=self.random.randrange(10 ** 6))
+
+    def create_users(self):
+        first = next_id(CustomUser)
+        ids = range(first, first + self.options['users'])
+        # Пароль непригоден для входа и не требует хеширования на каждого.
+        password = make_password(None)
+        self.bulk_create(CustomUser, (
+            CustomUser(id=pk, username=f'user{pk}',
+                       email=f'user{pk}@yamdb.fake', password=password)
+            for pk in ids
+        ))
+        return ids
+
+    def create_named(self, model, prefix, count):
+        first = next_id(model)
+        ids = range(first, first + count)
+        self.bulk_create(model, (
+            model(id=pk, name=f'{prefix.capitalize()} {pk}',
+                  slug=f'{prefix}-{pk}')
+            for pk in ids
+        ))
+        return ids
+
+    def create_titles(self):
+        first = next_id(Title)
+        ids = range(first, first + self.options['titles'])
+        year = self.now.year
+        description = 'x' * self.options['description_length']
+        self.bulk_create(Title, (
+            Title(id=pk, name=f'Title {pk}', description=description,
+                  year=self.random.randint(1900, year),
+                  category_id=(self.random.choice(self.category_ids)
+                               if self.category_ids else None))
+            for pk in ids
+        ))
+        if self.genre_ids:
+            self.bulk_create(Title.genre.through, self.title_genres(ids))
+        return ids
+
+    def title_genres(self, title_ids):
+        limit = min(self.options['genres_per_title'], len(self.genre_ids))
+        for title_id in title_ids:
+            count = self.random.randint(1, limit) if limit else 0
+            for genre_id in self.random.sample(self.genre_ids, count):
+                yield Title.genre.through(title_id=title_id,
+                                          genre_id=genre_id)
+
+    def review_counts(self):
+        """Число отзывов для каждого произведения по закону Ципфа."""
+        exponent = self.options['zipf']
+        total = self.options['reviews_per_title'] * len(self.title_ids)
+        norm = zipf_norm(len(self.title_ids), exponent)
+        users = len(self.user_ids)
+        for rank, title_id in enumerate(self.title_ids, start=1):
+            expected = total * rank ** -exponent / norm
+            count = int(expected)
+            if self.random.random() < expected - count:
+                count += 1
+            yield title_id, min(count, users)
+
+    def create_reviews(self):
+        review_id = next_id(Review)
+        comment_id = next_id(Comment)
+        comments_mean = self.options['comments_per_review']
+        reviews, comments, counters = [], [], []
+        created_reviews = created_comments = 0
+        for title_id, count in self.review_counts():
+            rating_sum = 0
+            histogram = dict.fromkeys(SCORE_FIELDS, 0)
+            for author_id in self.random.sample(self.user_ids, count):
+                score = self.random.randint(1, 10)
+                pub_date = self.random_date()
+                rating_sum += score
+                histogram[score_field(score)] += 1
+                reviews.append(Review(
+                    id=review_id, title_id=title_id, author_id=author_id,
+                    score=score, text=f'Review {review_id}',
+                    pub_date=pub_date,
+                ))
+                comment_count = (
+                    int(self.random.expovariate(1 / comments_mean))
+                    if comments_mean > 0 else 0
+                )
+                reviews[-1].comment_count = comment_count
+                for _ in range(comment_count):
+                    comments.append(Comment(
+                        id=comment_id, review_id=review_id,
+                        author_id=self.random.choice(self.user_ids),
+                        text=f'Comment {comment_id}',
+                        pub_date=self.random_date(after=pub_date),
+                    ))
+                    comment_id += 1
+                review_id += 1
+                if len(reviews) + len(comments) >= self.batch_size:
+                    created_reviews += len(reviews)
+                    created_comments += len(comments)
+                    self.flush(reviews, comments, counters)
+            if not count:
+                # Новые произведения уже созданы с нулевыми счётчиками.
+                continue
+            counters.append(Title(
+                id=title_id, rating_sum=rating_sum, rating_count=count,
+                rating_avg=rating_sum / count, **histogram))
+            if len(counters) >= self.batch_size:
+                created_reviews += len(reviews)
+                created_comments += len(comments)
+                self.flush(reviews, comments, counters)
+        created_reviews += len(reviews)
+        created_comments += len(comments)
+        self.flush(reviews, comments, counters)
+        return created_reviews, created_comments
+
+    def flush(self, reviews, comments, counters):
+        # Отзывы пишутся раньше комментариев из-за внешнего ключа.
+        self.bulk_create(Review, reviews)
+        self.bulk_create(Comment, comments)
+        if counters:
+            Title.objects.bulk_update(counters,
+                                      ['rating_sum', 'rating_count',
+                                       'rating_avg', *SCORE_FIELDS],
+                                      batch_size=self.batch_size)
+        reviews.clear()
+        comments.clear()
+        counters.clear()
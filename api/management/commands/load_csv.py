@@ -0,0 +1,117 @@
+import csv
+import os
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import search
+from api.cache import bump_all_versions
+from api.models import Category, Comment, CustomUser, Genre, Review, Title
+
+from ..utils import batches, keep_pub_date, reset_sequences
+
+
+def user_row(row):
+    return CustomUser(
+        id=row['id'], username=row['username'], email=row['email'],
+        role=row['role'], bio=row['description'] or None,
+        first_name=row['first_name'], last_name=row['last_name'],
+        password=make_password(None),
+    )
+
+
+def category_row(row):
+    return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def genre_row(row):
+    return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def title_row(row):
+    return Title(
+        id=row['id'], name=row['name'], year=row['year'] or None,
+        category_id=row['category'] or None,
+        description=row.get('description', ''),
+    )
+
+
+def genre_title_row(row):
+    return Title.genre.through(
+        id=row['id'], title_id=row['title_id'], genre_id=row['genre_id']
+    )
+
+
+def review_row(row):
+    return Review(
+        id=row['id'], title_id=row['title_id'], text=row['text'],
+        author_id=row['author'], score=row['score'],
+        pub_date=row['pub_date'],
+    )
+
+
+def comment_row(row):
+    return Comment(
+        id=row['id'], review_id=row['review_id'], text=row['text'],
+        author_id=row['author'], pub_date=row['pub_date'],
+    )
+
+
+# Порядок важен: каждая таблица ссылается только на уже загруженные.
+TABLES = (
+    ('users.csv', CustomUser, user_row),
+    ('category.csv', Category, category_row),
+    ('genre.csv', Genre, genre_row),
+    ('titles.csv', Title, title_row),
+    ('genre_title.csv', Title.genre.through, genre_title_row),
+    ('review.csv', Review, review_row),
+    ('comments.csv', Comment, comment_row),
+)
+
+
+class Command(BaseCommand):
+    help = 'Загружает CSV-файлы из data/ в базу с сохранением id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError(f'Каталог {path} не найден')
+        for filename, model, make_object in TABLES:
+            filepath = os.path.join(path, filename)
+            if not os.path.exists(filepath):
+                self.stdout.write(f'{filename}: пропущен, файла нет')
+                continue
+            before = model.objects.count()
+            count = self.load_table(filepath, model, make_object,
+                                    options['batch_size'])
+            loaded = model.objects.count() - before
+            message = f'{filename}: {loaded}'
+            if loaded != count:
+                message += f' (пропущено дублей: {count - loaded})'
+            self.stdout.write(message)
+        reset_sequences([model for _, model, _ in TABLES])
+        call_command('recalc_ratings', stdout=self.stdout)
+        call_command('rebuild_score_histograms', stdout=self.stdout)
+        search.rebuild_index()
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS('Данные загружены'))
+
+    def load_table(self, filepath, model, make_object, batch_size):
+        count = 0
+        with open(filepath, encoding='utf-8', newline='') as csv_file:
+            rows = (make_object(row) for row in csv.DictReader(csv_file))
+            with transaction.atomic(), keep_pub_date(model):
+                for batch in batches(rows, batch_size):
+                    model.objects.bulk_create(batch, ignore_conflicts=True)
+                    count += len(batch)
+        return count
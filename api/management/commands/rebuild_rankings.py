@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import ranking
+from api.cache import bump_version
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает среднюю оценку каталога и байесовский рейтинг '
+            'всех произведений.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = ranking.rebuild(options['batch_size'])
+        bump_version('titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'В рейтинге произведений: {count}, средняя оценка '
+            f'{ranking.get_prior_mean():.3f}'
+        ))
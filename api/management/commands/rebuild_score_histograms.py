@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.cache import bump_version
+from api.models import SCORE_FIELDS, SCORES, Review, Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает гистограммы оценок Title.score_N_count по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не сохранять.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        histograms = {}
+        counts = Review.objects.values('title_id', 'score').annotate(
+            count=Count('id')
+        ).order_by()
+        for row in counts:
+            histogram = histograms.setdefault(row['title_id'],
+                                              [0] * len(SCORES))
+            histogram[SCORES.index(row['score'])] = row['count']
+        drifted = []
+        now = timezone.now()
+        stored = Title.objects.values_list('pk', *SCORE_FIELDS).iterator(
+            chunk_size=options['batch_size'])
+        for pk, *histogram in stored:
+            expected = histograms.get(pk, [0] * len(SCORES))
+            if histogram != expected:
+                self.stdout.write(f'title {pk}: {histogram} -> {expected}')
+                drifted.append(Title(pk=pk, updated_at=now,
+                                     **dict(zip(SCORE_FIELDS, expected))))
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Title.objects.bulk_update(
+                    drifted, [*SCORE_FIELDS, 'updated_at'],
+                    batch_size=options['batch_size']
+                )
+            bump_version('titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'Расхождений: {len(drifted)}'
+            + (' (dry run)' if options['dry_run'] else '')
+        ))
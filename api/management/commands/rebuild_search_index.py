@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api import search
+from api.cache import bump_version
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index(options['batch_size'])
+        bump_version('titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано произведений: {count}'
+        ))
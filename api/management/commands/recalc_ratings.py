@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from api import ranking
+from api.cache import bump_version
+from api.models import Comment, Review, Title
+
+
+def average(total, count):
+    return total / count if count else None
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает Title.rating_sum/rating_count по отзывам '
+            'и Review.comment_count по комментариям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не сохранять.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = self.recalc_titles(options)
+        drifted += self.recalc_reviews(options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Расхождений: {drifted}'
+            + (' (dry run)' if options['dry_run'] else '')
+        ))
+
+    def recalc_titles(self, options):
+        totals = {
+            row['title_id']: (row['total'], row['count'])
+            for row in Review.objects.values('title_id').annotate(
+                total=Sum('score'), count=Count('id')
+            ).order_by()
+        }
+        drifted = []
+        now = timezone.now()
+        stored = Title.objects.values_list(
+            'pk', 'rating_sum', 'rating_count', 'rating_avg'
+        ).iterator(chunk_size=options['batch_size'])
+        for pk, rating_sum, rating_count, rating_avg in stored:
+            expected = totals.get(pk, (0, 0))
+            if ((rating_sum, rating_count, rating_avg)
+                    != (*expected, average(*expected))):
+                self.stdout.write(
+                    f'title {pk}: sum {rating_sum} -> {expected[0]}, '
+                    f'count {rating_count} -> {expected[1]}'
+                )
+                drifted.append(Title(pk=pk, rating_sum=expected[0],
+                                     rating_count=expected[1],
+                                     rating_avg=average(*expected),
+                                     updated_at=now))
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Title.objects.bulk_update(
+                    drifted, ['rating_sum', 'rating_count', 'rating_avg',
+                              'updated_at'],
+                    batch_size=options['batch_size']
+                )
+            ranking.rebuild(options['batch_size'])
+            bump_version('reviews')
+        return len(drifted)
+
+    def recalc_reviews(self, options):
+        totals = dict(
+            Comment.objects.values('review_id').annotate(
+                count=Count('id')
+            ).order_by().values_list('review_id', 'count')
+        )
+        drifted = []
+        now = timezone.now()
+        stored = Review.objects.values_list(
+            'pk', 'comment_count'
+        ).iterator(chunk_size=options['batch_size'])
+        for pk, comment_count in stored:
+            expected = totals.get(pk, 0)
+            if comment_count != expected:
+                self.stdout.write(
+                    f'review {pk}: comments {comment_count} -> {expected}'
+                )
+                drifted.append(Review(pk=pk, comment_count=expected,
+                                      updated_at=now))
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Review.objects.bulk_update(
+                    drifted, ['comment_count', 'updated_at'],
+                    batch_size=options['batch_size']
+                )
+            bump_version('reviews')
+        return len(drifted)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int,
+                            default=outbox.MAX_ATTEMPTS)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между опросами очереди, секунды.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.drain(
+                options['workers'], options['batch_size'],
+                options['max_attempts']
+            )
+            if sent or failed:
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
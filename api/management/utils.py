@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+@contextmanager
+def keep_pub_date(model):
+    """Не даёт auto_now_add перезаписать pub_date при bulk_create."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
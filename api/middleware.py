@@ -0,0 +1,76 @@
+"""Учёт запросов к базе на каждый HTTP-запрос.
+
+QueryCounter через execute_wrapper считает запросы и суммарное время
+в базе независимо от DEBUG. В режиме DEBUG QueryCountMiddleware
+отдаёт их в заголовках X-DB-Query-Count и X-DB-Time-Ms, а если у
+маршрута есть бюджет в api.urls.QUERY_BUDGETS — ещё X-DB-Query-Budget
+и предупреждение в лог при превышении. Тесты проверяют бюджеты тем же
+счётчиком (tests/test_20_query_budget.py).
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 3)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+def get_query_budget(request):
+    from .urls import QUERY_BUDGETS
+
+    match = request.resolver_match
+    budget = QUERY_BUDGETS.get(match.url_name) if match else None
+    if isinstance(budget, dict):
+        budget = budget.get(request.method, budget.get('default'))
+    return budget
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DEBUG:
+            return self.get_response(request)
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        response['X-DB-Query-Count'] = counter.count
+        response['X-DB-Time-Ms'] = counter.duration_ms
+        budget = get_query_budget(request)
+        if budget is not None:
+            response['X-DB-Query-Budget'] = budget
+            if counter.count > budget:
+                logger.warning('%s %s: %d запросов к базе при бюджете %d',
+                               request.method, request.path,
+                               counter.count, budget)
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 3.0.5 on 2026-10-18 18:56
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_counters(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    Review = apps.get_model('api', 'Review')
+    totals = Review.objects.values('title_id').annotate(
+        total=Sum('score'), count=Count('id')
+    ).order_by()
+    titles = []
+    for row in totals:
+        titles.append(Title(pk=row['title_id'], rating_sum=row['total'],
+                            rating_count=row['count']))
+    Title.objects.bulk_update(titles, ['rating_sum', 'rating_count'],
+                              batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_auto_20210405_1945'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_counters,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from api import search
+
+    if not search.is_supported(schema_editor.connection):
+        return
+    Title = apps.get_model('api', 'Title')
+    schema_editor.execute(search.CREATE_SQL)
+    rows = [
+        (pk, name.casefold(), (description or '').casefold())
+        for pk, name, description in Title.objects.values_list(
+            'pk', 'name', 'description').iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {search.FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)', rows
+        )
+
+
+def drop_index(apps, schema_editor):
+    from api import search
+
+    if search.is_supported(schema_editor.connection):
+        schema_editor.execute(search.DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_review_comment_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.5 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(fields=['name'], name='genre_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+    ]
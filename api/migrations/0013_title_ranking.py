@@ -0,0 +1,58 @@
+# Generated by Django 3.0.5 on 2026-10-18 19:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    TitleRanking = apps.get_model('api', 'TitleRanking')
+    totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                     count=Sum('rating_count'))
+    if not totals['count']:
+        return
+    mean = totals['total'] / totals['count']
+    votes = settings.RANKING_PRIOR_VOTES
+    rows = Title.objects.filter(rating_count__gt=0).values(
+        'pk', 'rating_sum', 'rating_count', 'year', 'category_id')
+    TitleRanking.objects.bulk_create([
+        TitleRanking(title_id=row['pk'], year=row['year'],
+                     category_id=row['category_id'],
+                     score=(row['rating_sum'] + votes * mean)
+                     / (row['rating_count'] + votes))
+        for row in rows.iterator()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_title_year_genre_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='api.Title')),
+                ('score', models.FloatField()),
+                ('year', models.IntegerField(null=True)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.Category')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-score', 'title'], name='ranking_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['category', '-score', 'title'], name='ranking_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['year', '-score', 'title'], name='ranking_year_score_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
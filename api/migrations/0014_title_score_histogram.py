@@ -0,0 +1,82 @@
+# Generated by Django 3.0.5 on 2026-10-18 19:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_score_histograms(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    Review = apps.get_model('api', 'Review')
+    counts = Review.objects.values('title_id', 'score').annotate(
+        count=Count('id')
+    ).order_by()
+    titles = {}
+    for row in counts:
+        title = titles.setdefault(row['title_id'],
+                                  Title(pk=row['title_id']))
+        setattr(title, f'score_{row["score"]}_count', row['count'])
+    Title.objects.bulk_update(
+        list(titles.values()),
+        [f'score_{score}_count' for score in range(1, 11)], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_title_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_10_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_score_histograms,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.0.5 on 2026-10-18 19:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_comment_counts(apps, schema_editor):
+    Review = apps.get_model('api', 'Review')
+    Comment = apps.get_model('api', 'Comment')
+    counts = Comment.objects.values('review_id').annotate(
+        count=Count('id')
+    ).order_by()
+    Review.objects.bulk_update(
+        [Review(pk=row['review_id'], comment_count=row['count'])
+         for row in counts],
+        ['comment_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_count', 'id'], name='title_review_count_idx'),
+        ),
+        migrations.RunPython(fill_comment_counts,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.0.5 on 2026-10-18 19:43
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast
+
+
+def fill_rating_avg(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    Title.objects.filter(rating_count__gt=0).update(
+        rating_avg=ExpressionWrapper(
+            Cast('rating_sum', FloatField()) / F('rating_count'),
+            output_field=FloatField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_review_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_avg',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_avg', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_avg', '-year', 'name', 'id'], name='title_rating_year_name_idx'),
+        ),
+        migrations.RunPython(fill_rating_avg, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:04
+
+import time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+RESOURCES = ('titles', 'genres', 'categories', 'reviews', 'comments')
+
+
+def create_versions(apps, schema_editor):
+    ResourceVersion = apps.get_model('api', 'ResourceVersion')
+    now = timezone.now()
+    ResourceVersion.objects.bulk_create([
+        ResourceVersion(resource=resource, version=time.time_ns(),
+                        modified=now)
+        for resource in RESOURCES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_title_orderings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('resource', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+                ('modified', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
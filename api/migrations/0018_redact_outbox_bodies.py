@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def redact_bodies(apps, schema_editor):
+    OutboxEmail = apps.get_model('api', 'OutboxEmail')
+    OutboxEmail.objects.exclude(status='pending').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_resource_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_bodies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+import time
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def create_users_version(apps, schema_editor):
+    ResourceVersion = apps.get_model('api', 'ResourceVersion')
+    ResourceVersion.objects.get_or_create(
+        resource='users',
+        defaults={'version': time.time_ns(), 'modified': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_redact_outbox_bodies'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_users_version, migrations.RunPython.noop),
+    ]
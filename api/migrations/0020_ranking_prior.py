@@ -0,0 +1,31 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:42
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def create_prior(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    RankingPrior = apps.get_model('api', 'RankingPrior')
+    totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                     count=Sum('rating_count'))
+    mean = totals['total'] / totals['count'] if totals['count'] else 0.0
+    RankingPrior.objects.create(pk=1, mean=mean)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_users_resource_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingPrior',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('mean', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(create_prior, migrations.RunPython.noop),
+    ]
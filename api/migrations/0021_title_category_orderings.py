@@ -0,0 +1,33 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_ranking_prior'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name', 'id'], name='title_cat_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating_avg', 'id'], name='title_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating_count', 'id'], name='title_cat_review_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year', 'id'], name='title_cat_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating_avg', '-year', 'name', 'id'], name='title_cat_rating_year_name_idx'),
+        ),
+    ]
@@ -1,4 +1,19 @@
+import hashlib
+import math
+from itertools import islice
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .cache import get_last_modified, get_version, params_digest
+from .renderers import dumps
 
 
 class DeleteViewSet(mixins.DestroyModelMixin,
@@ -6,3 +21,272 @@ class DeleteViewSet(mixins.DestroyModelMixin,
                     mixins.CreateModelMixin,
                     viewsets.GenericViewSet):
     pass
+
+
+class ResponseCacheMixin:
+    """Условный GET и кеш отрендеренных JSON-ответов для чтения.
+
+    ETag и Last-Modified строятся из версий ресурсов cache_dependencies
+    в базе, которые поднимаются сигналами (см. api.cache и api.signals),
+    поэтому на 304 выполняется только чтение версий, без queryset и
+    сериализатора. При cache_responses
+    готовый ответ также кешируется на сервере; ключ — путь,
+    нормализованные query-параметры, класс аутентификации и версии.
+    """
+    cache_dependencies = ()
+    cache_responses = True
+    cache_timeout = 300
+    cached_formats = ('json',)
+    response_cache_key = None
+    validators = None
+
+    def get_versions_key(self, request):
+        authenticator = request.successful_authenticator
+        versions = '.'.join(str(get_version(resource))
+                            for resource in self.cache_dependencies)
+        return '{}:{}:{}:{}:{}'.format(
+            versions, request.path, params_digest(request.query_params),
+            type(authenticator).__name__ if authenticator else 'anonymous',
+            request.accepted_renderer.format,
+        )
+
+    def get_validators(self, versions_key):
+        etag = '"{}"'.format(hashlib.md5(versions_key.encode()).hexdigest())
+        last_modified = max(get_last_modified(resource)
+                            for resource in self.cache_dependencies)
+        return etag, math.ceil(last_modified)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if (not self.cache_dependencies
+                or request.accepted_renderer.format
+                not in self.cached_formats):
+            return handler(request, *args, **kwargs)
+        versions_key = self.get_versions_key(request)
+        self.validators = self.get_validators(versions_key)
+        etag, last_modified = self.validators
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        if not self.cache_responses:
+            return handler(request, *args, **kwargs)
+        self.response_cache_key = 'response:' + versions_key
+        cached = cache.get(self.response_cache_key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response,
+                                             *args, **kwargs)
+        if (self.validators is not None
+                and response.status_code in (200, 304)):
+            etag, last_modified = self.validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        if (self.response_cache_key is not None
+                and isinstance(response, Response)
+                and response.status_code == 200):
+            response.render()
+            cache.set(self.response_cache_key,
+                      (response.content, response['Content-Type']),
+                      self.cache_timeout)
+        return response
+
+
+class CachedListMixin(ResponseCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(ResponseCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """``?fields=id,name`` на чтении: только перечисленные поля.
+
+    Сериализатор урезается до запрошенных полей, а shape_queryset()
+    делает select_related только для нужных связей field_relations и
+    defer() для незапрошенных тяжёлых колонок deferrable_fields.
+    Поля из Meta.optional_fields сериализатора отдаются, только если
+    их запросили явно.
+    """
+    fields_query_param = 'fields'
+    field_relations = {}
+    deferrable_fields = ()
+
+    def get_optional_fields(self):
+        meta = getattr(self.get_serializer_class(), 'Meta', None)
+        return getattr(meta, 'optional_fields', ())
+
+    def get_available_fields(self):
+        serializer = self.get_serializer_class()(
+            context={'optional_fields': self.get_optional_fields()})
+        return list(serializer.fields)
+
+    def get_requested_fields(self):
+        """Запрошенные поля в порядке сериализатора или None — все."""
+        value = None
+        if self.request.method in SAFE_METHODS:
+            value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            optional = self.get_optional_fields()
+            if not optional:
+                return None
+            return [name for name in self.get_available_fields()
+                    if name not in optional]
+        requested = {name.strip() for name in value.split(',')} - {''}
+        available = self.get_available_fields()
+        unknown = requested.difference(available)
+        if unknown:
+            raise ValidationError({self.fields_query_param: [
+                'Неизвестные поля: {}'.format(', '.join(sorted(unknown)))
+            ]})
+        return [name for name in available if name in requested]
+
+    def shape_queryset(self, queryset):
+        fields = self.get_requested_fields()
+        for field, relation in self.field_relations.items():
+            if fields is None or field in fields:
+                queryset = queryset.select_related(relation)
+        if fields is not None:
+            deferred = [name for name in self.deferrable_fields
+                        if name not in fields]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_requested_fields() or ()
+        context['optional_fields'] = [name for name in fields
+                                      if name in self.get_optional_fields()]
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields).difference(fields):
+                target.fields.pop(name)
+        return serializer
+
+
+class RowsMixin:
+    """Контракт чтения строками: read_rows() и represent_rows().
+
+    По умолчанию строки — объекты модели, а представление — данные
+    serializer_class. View, читающий через values() (например,
+    TitleViewSet), переопределяет оба метода; их используют
+    ValuesReadMixin и StreamingListMixin.
+    """
+
+    def read_rows(self, queryset):
+        """Queryset -> queryset строк.
+
+        Строки читаются пагинацией и фильтром lookup_field, поэтому в
+        них должны быть поля ordering и lookup_field.
+        """
+        return queryset
+
+    def represent_rows(self, rows):
+        """Строки read_rows() -> список данных ответа.
+
+        Данные должны совпадать с тем, что отдал бы serializer_class.
+        """
+        return self.get_serializer(rows, many=True).data
+
+
+class ValuesReadMixin(RowsMixin):
+    """list и retrieve через read_rows() и represent_rows().
+
+    Запись по-прежнему идёт через сериализатор.
+    """
+
+    def list(self, request, *args, **kwargs):
+        rows = self.read_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.represent_rows(page))
+        return Response(self.represent_rows(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = self.read_rows(self.filter_queryset(self.get_queryset()))
+        # get_object_or_404 из DRF: неверный тип ключа даёт 404, а не 500.
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(self.represent_rows([row])[0])
+
+
+class StreamingListMixin(RowsMixin):
+    """``?stream=1``: список в JSON отдаётся по частям.
+
+    Страница читается через iterator(chunk_size=stream_chunk_size) и
+    кодируется кусками того же размера, так что память не зависит от
+    limit. JSON совпадает с обычным ответом; ключи get_extra_data()
+    идут после results. Работает с пагинацией LazyLimitOffsetMixin и без
+    пагинации; в остальных случаях запрос обрабатывается как обычно.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def get_extra_data(self):
+        """Ключи страницы после results, например facets."""
+        return {}
+
+    def use_stream(self, request):
+        if (request.query_params.get(self.stream_query_param)
+                not in ('1', 'true')
+                or request.accepted_renderer.format != 'json'):
+            return False
+        paginator = self.paginator
+        return paginator is None or (
+            hasattr(paginator, 'paginate_queryset_lazy')
+            and paginator.can_stream(request)
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        envelope = None
+        if self.paginator is not None:
+            page = self.paginator.paginate_queryset_lazy(queryset, request,
+                                                         view=self)
+            if page is not None:
+                queryset = page
+                envelope = self.paginator.get_paginated_envelope()
+        rows = self.read_rows(queryset).iterator(
+            chunk_size=self.stream_chunk_size)
+        extra = self.get_extra_data() if envelope is not None else {}
+        return StreamingHttpResponse(
+            self.stream_json(envelope, rows, extra),
+            content_type=request.accepted_renderer.media_type
+        )
+
+    def stream_json(self, envelope, rows, extra=None):
+        if envelope is None:
+            yield b'['
+        else:
+            yield dumps(envelope)[:-1] + b',"results":['
+        separator = b''
+        while True:
+            chunk = list(islice(rows, self.stream_chunk_size))
+            if not chunk:
+                break
+            yield separator + dumps(self.represent_rows(chunk))[1:-1]
+            separator = b','
+        if envelope is None:
+            yield b']'
+        elif extra:
+            yield b'],' + dumps(extra)[1:]
+        else:
+            yield b']}'
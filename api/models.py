@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from .validators import custom_year_validator
 
@@ -19,6 +20,8 @@ class CustomUser(AbstractUser):
     role = models.CharField('Роль', max_length=10, choices=Roles.choices,
                             default=Roles.USER)
     bio = models.TextField(blank=True, null=True)
+    # Увеличивается при смене прав, делая недействительными выданные токены.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
 
 class Category(models.Model):
@@ -35,6 +38,20 @@ class Genre(models.Model):
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['name'], name='genre_name_idx'),
+        ]
+
+
+# Допустимые оценки отзыва и имена счётчиков гистограммы в Title.
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    return f'score_{score}_count'
+
+
+SCORE_FIELDS = tuple(score_field(score) for score in SCORES)
 
 
 class Title(models.Model):
@@ -51,6 +68,60 @@ class Title(models.Model):
     category = models.ForeignKey(Category, related_name='titles',
                                  on_delete=models.SET_NULL, null=True,
                                  blank=True)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    # rating_sum / rating_count для сортировки по индексу; NULL без отзывов.
+    rating_avg = models.FloatField(null=True, editable=False)
+    score_1_count = models.PositiveIntegerField(default=0, editable=False)
+    score_2_count = models.PositiveIntegerField(default=0, editable=False)
+    score_3_count = models.PositiveIntegerField(default=0, editable=False)
+    score_4_count = models.PositiveIntegerField(default=0, editable=False)
+    score_5_count = models.PositiveIntegerField(default=0, editable=False)
+    score_6_count = models.PositiveIntegerField(default=0, editable=False)
+    score_7_count = models.PositiveIntegerField(default=0, editable=False)
+    score_8_count = models.PositiveIntegerField(default=0, editable=False)
+    score_9_count = models.PositiveIntegerField(default=0, editable=False)
+    score_10_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['rating_count', 'id'],
+                         name='title_review_count_idx'),
+            models.Index(fields=['rating_avg', 'id'],
+                         name='title_rating_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(fields=['rating_avg', '-year', 'name', 'id'],
+                         name='title_rating_year_name_idx'),
+            # Те же сортировки внутри одной категории.
+            models.Index(fields=['category', 'name', 'id'],
+                         name='title_cat_name_idx'),
+            models.Index(fields=['category', 'rating_avg', 'id'],
+                         name='title_cat_rating_idx'),
+            models.Index(fields=['category', 'rating_count', 'id'],
+                         name='title_cat_review_count_idx'),
+            models.Index(fields=['category', 'year', 'id'],
+                         name='title_cat_year_idx'),
+            models.Index(fields=['category', 'rating_avg', '-year', 'name',
+                                 'id'],
+                         name='title_cat_rating_year_name_idx'),
+        ]
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def review_count(self):
+        # У каждого отзыва есть оценка, так что отзывов ровно rating_count.
+        return self.rating_count
+
+    @property
+    def score_histogram(self):
+        return {score: getattr(self, score_field(score)) for score in SCORES}
 
 
 class Review(models.Model):
@@ -62,10 +133,22 @@ class Review(models.Model):
     title = models.ForeignKey(Title, related_name='reviews',
                               on_delete=models.CASCADE)
     pub_date = models.DateTimeField(auto_now_add=True)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ('-pub_date', )
         unique_together = ('author', 'title')
+        indexes = [
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Title.rating_* are adjusted from signals; keep the review row
+        # and the counters in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -75,6 +158,101 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(auto_now_add=True)
     review = models.ForeignKey(Review, on_delete=models.CASCADE,
                                related_name='comments')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Review.comment_count is adjusted from signals.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TitleRanking(models.Model):
+    """Байесовская оценка произведения для /titles/top/ (см. api.ranking).
+
+    Строка есть только у произведений с отзывами; year и category
+    продублированы из Title, чтобы фильтры рейтинга шли по индексам
+    этой таблицы.
+    """
+    title = models.OneToOneField(Title, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='ranking')
+    score = models.FloatField()
+    year = models.IntegerField(null=True)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL,
+                                 null=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'title'],
+                         name='ranking_score_idx'),
+            models.Index(fields=['category', '-score', 'title'],
+                         name='ranking_category_score_idx'),
+            models.Index(fields=['year', '-score', 'title'],
+                         name='ranking_year_score_idx'),
+        ]
+
+
+class RankingPrior(models.Model):
+    """Средняя оценка каталога C для байесовского рейтинга (см. api.ranking).
+
+    Одна строка. Хранится в базе рядом с TitleRanking, чтобы все
+    процессы пересчитывали оценки с тем C, с которым построена таблица.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    mean = models.FloatField()
+
+
+class ResourceVersion(models.Model):
+    """Версия и время изменения ресурса для кешей и ETag (см. api.cache).
+
+    Хранится в базе, а не в кеше, чтобы запись в одном процессе сразу
+    меняла ключи кеша и валидаторы во всех остальных.
+    """
+    resource = models.CharField(max_length=20, primary_key=True)
+    version = models.BigIntegerField()
+    modified = models.DateTimeField()
+
+
+class OneTimeCode(models.Model):
+    """Код подтверждения: HMAC от кода, срок жизни и счётчик попыток."""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE,
+                                related_name='one_time_code')
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки воркером send_outbox."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbox_status_due_idx'),
+        ]
@@ -0,0 +1,82 @@
+"""Выдача и проверка одноразовых кодов подтверждения.
+
+Код хранится как HMAC-SHA256 с SECRET_KEY: проверка — одно вычисление
+HMAC и сравнение за постоянное время, без PBKDF2 и без записи в
+пароль пользователя. Код одноразовый, живёт OTP_TTL и сгорает после
+OTP_MAX_ATTEMPTS неверных попыток.
+"""
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OneTimeCode
+
+
+def get_ttl():
+    return settings.OTP_TTL
+
+
+def get_max_attempts():
+    return settings.OTP_MAX_ATTEMPTS
+
+
+def generate_code():
+    return str(1111 + secrets.randbelow(8889))
+
+
+def code_hash(user_id, code):
+    message = f'{user_id}:{code}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message,
+                    hashlib.sha256).hexdigest()
+
+
+def issue_code(user, code=None):
+    """Сохраняет новый код пользователя вместо прежнего и возвращает его."""
+    code = code or generate_code()
+    OneTimeCode.objects.update_or_create(
+        user=user,
+        defaults={
+            'code_hash': code_hash(user.pk, code),
+            'expires_at': timezone.now() + get_ttl(),
+            'attempts': 0,
+        }
+    )
+    return code
+
+
+def verify_code(email, code):
+    """Возвращает пользователя, если код верный, иначе None.
+
+    Верный код удаляется, неверный увеличивает счётчик попыток.
+    """
+    if not email or not code:
+        return None
+    otp = OneTimeCode.objects.select_related('user').filter(
+        user__email=email, expires_at__gt=timezone.now(),
+        attempts__lt=get_max_attempts(),
+    ).first()
+    if otp is None:
+        return None
+    if not hmac.compare_digest(otp.code_hash,
+                               code_hash(otp.user_id, str(code))):
+        OneTimeCode.objects.filter(pk=otp.pk).update(
+            attempts=F('attempts') + 1
+        )
+        return None
+    # Удаление по (pk, code_hash) не даст использовать код дважды
+    # при параллельных запросах.
+    deleted, _ = OneTimeCode.objects.filter(
+        pk=otp.pk, code_hash=otp.code_hash
+    ).delete()
+    return otp.user if deleted else None
+
+
+def delete_expired():
+    deleted, _ = OneTimeCode.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,102 @@
+"""Очередь исходящих писем в базе (transactional outbox).
+
+Письмо сохраняется в OutboxEmail в той же транзакции, что и данные,
+из-за которых оно отправляется; воркер send_outbox забирает готовые
+к отправке строки и рассылает их пулом потоков. Строка «занимается»
+условным UPDATE, сдвигающим next_attempt_at на время аренды, поэтому
+несколько воркеров не отправят одно письмо дважды, а письма упавшего
+воркера снова станут доступны после окончания аренды. Текст письма
+(в нём код подтверждения) стирается, как только письмо отправлено или
+попытки кончились.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+LEASE = timedelta(minutes=5)
+BASE_DELAY = timedelta(seconds=30)
+MAX_DELAY = timedelta(hours=1)
+MAX_ATTEMPTS = 8
+
+
+def enqueue_email(subject, body, from_email, to):
+    return OutboxEmail.objects.create(subject=subject, body=body,
+                                      from_email=from_email, to=to)
+
+
+def backoff(attempts, base=BASE_DELAY, maximum=MAX_DELAY):
+    return min(base * 2 ** (attempts - 1), maximum)
+
+
+def claim(batch_size, lease=LEASE):
+    now = timezone.now()
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING, next_attempt_at__lte=now
+    ).order_by('next_attempt_at', 'pk')[:batch_size]
+    claimed = []
+    for email in due:
+        leased_until = now + lease
+        updated = OutboxEmail.objects.filter(
+            pk=email.pk, status=OutboxEmail.PENDING,
+            next_attempt_at=email.next_attempt_at,
+        ).update(next_attempt_at=leased_until)
+        if updated:
+            email.next_attempt_at = leased_until
+            claimed.append(email)
+    return claimed
+
+
+def send(email):
+    EmailMessage(email.subject, email.body, email.from_email,
+                 [email.to]).send()
+
+
+def record_result(email, error, max_attempts=MAX_ATTEMPTS):
+    email.attempts += 1
+    if error is None:
+        email.status = OutboxEmail.SENT
+        email.sent_at = timezone.now()
+        email.last_error = ''
+    else:
+        email.last_error = repr(error)
+        if email.attempts >= max_attempts:
+            email.status = OutboxEmail.FAILED
+        else:
+            email.next_attempt_at = timezone.now() + backoff(email.attempts)
+    if email.status != OutboxEmail.PENDING:
+        email.body = ''
+    email.save(update_fields=['attempts', 'status', 'sent_at', 'body',
+                              'last_error', 'next_attempt_at'])
+
+
+def process_batch(executor, batch_size, max_attempts=MAX_ATTEMPTS):
+    """Отправляет одну пачку писем; возвращает (отправлено, ошибок)."""
+    emails = claim(batch_size)
+    # Потоки только ходят в SMTP; запись результатов — в текущем потоке,
+    # чтобы не плодить соединения с базой.
+    futures = [(email, executor.submit(send, email)) for email in emails]
+    sent = failed = 0
+    for email, future in futures:
+        error = future.exception()
+        record_result(email, error, max_attempts)
+        if error is None:
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
+
+
+def drain(workers=4, batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """Отправляет всё, что готово к отправке прямо сейчас."""
+    total_sent = total_failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            sent, failed = process_batch(executor, batch_size, max_attempts)
+            total_sent += sent
+            total_failed += failed
+            if not sent and not failed:
+                return total_sent, total_failed
@@ -0,0 +1,318 @@
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Max, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (CursorPagination,
+                                       LimitOffsetPagination,
+                                       _reverse_ordering)
+
+from .cache import get_version, params_digest
+
+
+def estimate_count(model):
+    """Быстрая оценка числа строк без полного COUNT(*)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return row[0]
+    # Для автоинкрементного ключа MAX(pk) берётся из индекса и даёт
+    # оценку сверху.
+    return model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по составному ключу без COUNT и OFFSET.
+
+    В отличие от CursorPagination из DRF, позиция курсора хранит значения
+    всех полей ordering, а фильтр строится лексикографически:
+    (pub_date, id) < (p, i). Если последнее поле уникально, страница
+    любой глубины — это один индексный диапазон. Страница может состоять
+    из строк values(), если в них есть поля ordering. NULL считается
+    меньше любого значения, как при сортировке в SQLite.
+    """
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+    nullable = frozenset()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        limit = self.page_size + 1
+        if current_position is None:
+            results = list(queryset[offset:offset + limit])
+        else:
+            self.nullable = {
+                field.name for field in queryset.model._meta.concrete_fields
+                if field.null
+            }
+            values = self.decode_position(current_position, queryset.model)
+            results = list(queryset.filter(
+                self.keyset_filter(values, reverse)
+            )[offset:offset + limit])
+            tail = self.null_tail(values, reverse)
+            if tail is not None and len(results) < limit:
+                results += list(queryset.filter(tail)[:limit - len(results)])
+
+        self.page = list(results[:self.page_size])
+        if reverse:
+            self.page = list(reversed(self.page))
+        self.set_positions(results, offset, reverse, current_position)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def set_positions(self, results, offset, reverse, current_position):
+        if len(results) > self.page_size:
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        has_current = (current_position is not None) or (offset > 0)
+        if reverse:
+            self.has_next = has_current
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = has_current
+            self.next_position = following_position
+            self.previous_position = current_position
+
+    def decode_position(self, position, model):
+        """Значения позиции, приведённые к типам полей ordering."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self.to_python(model._meta.get_field(field.lstrip('-')), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, field, value):
+        if value is None:
+            if not field.null:
+                raise ValueError(value)
+            return None
+        if isinstance(value, (list, dict)):
+            raise TypeError(value)
+        return field.to_python(value)
+
+    def keyset_filter(self, values, reverse):
+        condition, equal = Q(), Q()
+        for number, (field, value) in enumerate(zip(self.ordering, values)):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            # NULL в первом поле читает отдельный запрос null_tail().
+            nullable = number > 0 and name in self.nullable
+            condition |= equal & self.compare(name, lookup, value, nullable)
+            equal &= Q(**{name: value} if value is not None
+                       else {f'{name}__isnull': True})
+        # Избыточная граница по первому полю даёт индексный диапазон
+        # вместо просмотра индекса с начала.
+        field, first = self.ordering[0], values[0]
+        if first is not None:
+            lookup = 'lte' if field.startswith('-') != reverse else 'gte'
+            condition &= Q(**{f'{field.lstrip("-")}__{lookup}': first})
+        return condition
+
+    def null_tail(self, values, reverse):
+        """Строки с NULL в первом поле, если они идут после позиции.
+
+        Условие «меньше значения или NULL» SQLite выполняет объединением
+        двух индексных выборок с сортировкой результата, поэтому NULL
+        дочитывается вторым запросом, когда диапазон значений кончился.
+        """
+        field, first = self.ordering[0], values[0]
+        name = field.lstrip('-')
+        if (first is None or name not in self.nullable
+                or field.startswith('-') == reverse):
+            return None
+        return Q(**{f'{name}__isnull': True})
+
+    def compare(self, name, lookup, value, nullable):
+        """name < value или name > value, где NULL меньше всех."""
+        if value is None:
+            if lookup == 'lt':
+                return Q(pk__in=[])
+            return Q(**{f'{name}__isnull': False})
+        condition = Q(**{f'{name}__{lookup}': value})
+        if lookup == 'lt' and nullable:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = (instance[name] if isinstance(instance, dict)
+                     else getattr(instance, name))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values)
+
+
+class LazyLimitOffsetMixin:
+    """Страница LimitOffsetPagination как queryset — для потоковой выдачи.
+
+    paginate_queryset_lazy() считает count и ссылки, но не выполняет
+    выборку: страницу можно читать через iterator().
+    """
+
+    def can_stream(self, request):
+        return True
+
+    def paginate_queryset_lazy(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = self.get_count(queryset)
+        self.offset = self.get_offset(request)
+        return queryset[self.offset:self.offset + self.limit]
+
+    def get_paginated_envelope(self):
+        """Ответ get_paginated_response() без results."""
+        return OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+
+
+class OptionalKeysetMixin:
+    """Включаемый режим курсора поверх LimitOffsetPagination.
+
+    ``?pagination=cursor`` (или наличие ``?cursor=``) переключает запрос
+    на KeysetPagination; ссылки next/previous сохраняют этот режим.
+    """
+    keyset_class = KeysetPagination
+    mode_query_param = 'pagination'
+    keyset = None
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return (params.get(self.mode_query_param) == 'cursor'
+                or self.keyset_class.cursor_query_param in params)
+
+    def can_stream(self, request):
+        return not self.use_keyset(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            page = self.keyset.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.keyset.display_page_controls
+            return page
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.keyset is not None:
+            return self.keyset.get_html_context()
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
+
+
+class OptionalKeysetPagination(OptionalKeysetMixin, LazyLimitOffsetMixin,
+                               LimitOffsetPagination):
+    """LimitOffsetPagination с включаемым режимом курсора."""
+
+
+class CachedCountPagination(LazyLimitOffsetMixin, LimitOffsetPagination):
+    """LimitOffsetPagination с дешёвым и кешируемым count.
+
+    count считается по view.get_count_queryset() — отфильтрованному
+    запросу без аннотаций и prefetch — и кешируется по набору фильтров
+    до смены версии ресурса view.cache_resource. Без фильтров
+    ``?count=estimate`` отдаёт оценку вместо точного COUNT(*).
+    """
+    count_query_param = 'count'
+    count_cache_timeout = 300
+    ignored_params = ('limit', 'offset', 'count', 'format', 'fields',
+                      'stream', 'facets', 'ordering')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        get_count_queryset = getattr(self.view, 'get_count_queryset', None)
+        if get_count_queryset is not None:
+            queryset = get_count_queryset()
+        params = self.request.query_params
+        filtered = any(name not in self.ignored_params for name in params)
+        if not filtered and params.get(self.count_query_param) == 'estimate':
+            return estimate_count(queryset.model)
+
+        resource = getattr(self.view, 'cache_resource', None)
+        if resource is None:
+            return super().get_count(queryset)
+        key = 'count:{}:{}:{}'.format(
+            resource, get_version(resource),
+            params_digest(params, self.ignored_params)
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+
+class CachedCountKeysetPagination(OptionalKeysetMixin, CachedCountPagination):
+    """CachedCountPagination с включаемым режимом курсора.
+
+    Порядок курсора задаёт get_ordering() фильтра сортировки view, как
+    у CursorPagination из DRF, так что под ним тот же индекс.
+    """
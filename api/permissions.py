@@ -6,7 +6,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.pk
                 or request.user.role in [Roles.ADMIN, Roles.MODERATOR])
 
 
@@ -0,0 +1,109 @@
+"""Байесовский рейтинг произведений для /titles/top/.
+
+score = (rating_sum + m * C) / (rating_count + m), где C — средняя
+оценка по всему каталогу, а m — settings.RANKING_PRIOR_VOTES: пока
+отзывов мало, оценка тянется к C, поэтому одна десятка не обгоняет
+тысячу девяток. Оценки хранятся в TitleRanking и обновляются сигналами
+при каждом изменении счётчиков произведения. C хранится в RankingPrior
+и читается в одной транзакции с записью оценки, поэтому все процессы
+считают с одним C. Пересчитывает его команда rebuild_rankings, которую
+стоит запускать периодически: она в одной транзакции записывает новый C
+и приводит к нему все оценки.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from .management.utils import batches
+from .models import RankingPrior, Title, TitleRanking
+
+PRIOR_ID = 1
+
+
+def compute_prior_mean():
+    totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                     count=Sum('rating_count'))
+    if not totals['count']:
+        return 0.0
+    return totals['total'] / totals['count']
+
+
+def get_prior_mean():
+    mean = RankingPrior.objects.filter(pk=PRIOR_ID).values_list(
+        'mean', flat=True).first()
+    if mean is None:
+        # Строку создаёт миграция; здесь — только после очистки таблицы.
+        mean = compute_prior_mean()
+        RankingPrior.objects.bulk_create(
+            [RankingPrior(pk=PRIOR_ID, mean=mean)], ignore_conflicts=True)
+    return mean
+
+
+def bayesian_score(rating_sum, rating_count, mean, votes=None):
+    if votes is None:
+        votes = settings.RANKING_PRIOR_VOTES
+    return (rating_sum + votes * mean) / (rating_count + votes)
+
+
+def build_ranking(row, mean):
+    return TitleRanking(
+        title_id=row['pk'], year=row['year'],
+        category_id=row['category_id'],
+        score=bayesian_score(row['rating_sum'], row['rating_count'], mean),
+    )
+
+
+RANKING_VALUES = ('pk', 'rating_sum', 'rating_count', 'year', 'category_id')
+
+
+def refresh_title(title_id):
+    """Пересчитывает строку рейтинга одного произведения."""
+    # C и оценка — в одной транзакции: rebuild() меняет их вместе.
+    with transaction.atomic(savepoint=False):
+        row = Title.objects.filter(pk=title_id).values(
+            *RANKING_VALUES).first()
+        if row is None or not row['rating_count']:
+            TitleRanking.objects.filter(title_id=title_id).delete()
+            return
+        ranking = build_ranking(row, get_prior_mean())
+        updated = TitleRanking.objects.filter(title_id=title_id).update(
+            score=ranking.score, year=ranking.year,
+            category_id=ranking.category_id,
+        )
+        if not updated:
+            ranking.save(force_insert=True)
+
+
+def rebuild(batch_size=5000):
+    """Пересчитывает C и всю таблицу; возвращает число строк."""
+    count = 0
+    with transaction.atomic():
+        mean = compute_prior_mean()
+        RankingPrior.objects.update_or_create(pk=PRIOR_ID,
+                                              defaults={'mean': mean})
+        rows = Title.objects.filter(rating_count__gt=0).values(
+            *RANKING_VALUES).order_by('pk').iterator(chunk_size=batch_size)
+        TitleRanking.objects.all().delete()
+        for batch in batches(rows, batch_size):
+            TitleRanking.objects.bulk_create(
+                [build_ranking(row, mean) for row in batch])
+            count += len(batch)
+    return count
+
+
+def top(genre=None, category=None, year_from=None, year_to=None,
+        limit=10):
+    """[(title_id, score)] лучших произведений по фильтрам."""
+    queryset = TitleRanking.objects.all()
+    if genre:
+        queryset = queryset.filter(
+            title_id__in=Title.genre.through.objects.filter(
+                genre__slug=genre).values('title_id'))
+    if category:
+        queryset = queryset.filter(category__slug=category)
+    if year_from is not None:
+        queryset = queryset.filter(year__gte=year_from)
+    if year_to is not None:
+        queryset = queryset.filter(year__lte=year_to)
+    return list(queryset.order_by('-score', 'title_id').values_list(
+        'title_id', 'score')[:limit])
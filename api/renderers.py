@@ -0,0 +1,72 @@
+"""JSON-рендерер на orjson, если он установлен, и общий кодировщик.
+
+orjson — необязательная зависимость: без него FastJSONRenderer ведёт
+себя как JSONRenderer из DRF. Вывод совпадает с компактным JSON DRF,
+включая экранирование U+2028/U+2029; типы, которых orjson не знает
+(Decimal, ленивые строки, datetime), кодируются encoder'ом DRF.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'),
+                   (b'\xe2\x80\xa9', b'\\u2029'))
+
+_encoder = encoders.JSONEncoder()
+
+
+def dumps_stdlib(data):
+    content = json.dumps(
+        data, cls=encoders.JSONEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON, separators=(',', ':')
+    )
+    return content.replace('\u2028', '\\u2028').replace(
+        '\u2029', '\\u2029').encode()
+
+
+def dumps(data):
+    """Компактный JSON в bytes, как у JSONRenderer без indent."""
+    if orjson is None or not api_settings.UNICODE_JSON:
+        return dumps_stdlib(data)
+    try:
+        content = orjson.dumps(data, default=_encoder.default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME)
+    except orjson.JSONEncodeError:
+        # Например, целые больше 64 бит.
+        return dumps_stdlib(data)
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type,
+                                 renderer_context or {})
+        if orjson is None or indent is not None or not self.compact:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        return dumps(data)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Одна строка JSON; данные выгрузки отдаются потоком мимо рендерера."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data) + b'\n'
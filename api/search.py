@@ -0,0 +1,105 @@
+"""Полнотекстовый поиск по произведениям на SQLite FTS5.
+
+Индекс — виртуальная таблица api_title_fts (rowid = Title.id) с
+колонками name и description. Текст и запрос приводятся к casefold(),
+а токенизатор unicode61 складывает регистр для всего Unicode, поэтому
+«побег» находит «Побег из Шоушенка». На других СУБД поиск сводится
+к icontains по тем же полям.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'api_title_fts'
+# Вес совпадения в названии относительно описания для bm25().
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+WORD_RE = re.compile(r'\w+')
+
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+    "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+)
+DROP_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Запрос пользователя -> выражение MATCH: все слова, по префиксу."""
+    words = WORD_RE.findall(query.casefold())
+    return ' AND '.join(f'"{word}"*' for word in words)
+
+
+def index_titles(titles):
+    if not is_supported():
+        return
+    rows = [(title.pk, title.name.casefold(),
+             (title.description or '').casefold()) for title in titles]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)', rows
+        )
+
+
+def unindex_title(pk):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index(batch_size=5000):
+    """Полностью перестраивает индекс, читая произведения пачками."""
+    from .models import Title
+
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    count = 0
+    batch = []
+    titles = Title.objects.only('pk', 'name', 'description').order_by('pk')
+    for title in titles.iterator(chunk_size=batch_size):
+        batch.append(title)
+        if len(batch) >= batch_size:
+            index_titles(batch)
+            count += len(batch)
+            batch = []
+    index_titles(batch)
+    return count + len(batch)
+
+
+def search_titles(queryset, query):
+    """Фильтрует queryset произведений и сортирует по релевантности."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        condition = Q()
+        for word in WORD_RE.findall(query):
+            condition &= (Q(name__icontains=word)
+                          | Q(description__icontains=word))
+        return queryset.filter(condition)
+    # Фильтр — подзапрос без ссылок на внешнюю таблицу, поэтому выборка
+    # остаётся корректной и внутри чужого подзапроса (pk__in фасетов),
+    # где Django переименовывает api_title в U0. Колонка релевантности
+    # в подзапросах отбрасывается вместе с сортировкой.
+    table = queryset.model._meta.db_table
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    )).extra(
+        select={'search_rank': (
+            f'SELECT bm25({FTS_TABLE}, %s, %s) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id'
+        )},
+        select_params=[NAME_WEIGHT, DESCRIPTION_WEIGHT, expression],
+    ).order_by('search_rank', 'pk')
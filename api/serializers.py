@@ -1,7 +1,13 @@
-from rest_framework import serializers
+from django.contrib.auth.models import update_last_login
+from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 
-from .models import Category, Comment, CustomUser, Genre, Review, Title
+from .authentication import add_user_claims
+from .fields import BulkSlugRelatedField
+from .models import (SCORE_FIELDS, SCORES, Category, Comment, CustomUser,
+                     Genre, Review, Title)
+from .otp import verify_code
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -17,16 +23,29 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(slug_field='slug',
-                                         queryset=Genre.objects.all(),
-                                         many=True)
+    genre = BulkSlugRelatedField(slug_field='slug',
+                                 queryset=Genre.objects.all(),
+                                 many=True)
     category = serializers.SlugRelatedField(slug_field='slug',
                                             queryset=Category.objects.all())
     rating = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    score_histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'rating_avg', 'updated_at',
+                   *SCORE_FIELDS)
+        # Отдаются, только если перечислены в context['optional_fields'].
+        optional_fields = ('score_histogram',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('optional_fields', ())
+        for name in self.Meta.optional_fields:
+            if name not in requested:
+                self.fields.pop(name)
 
     def to_representation(self, instance):
         data = super(TitleSerializer, self).to_representation(instance)
@@ -37,6 +56,86 @@ class TitleSerializer(serializers.ModelSerializer):
         return data
 
 
+# Колонки values(), нужные каждому полю TitleSerializer, в порядке полей.
+TITLE_COLUMNS = {
+    'id': ('id',),
+    'genre': (),
+    'category': ('category__name', 'category__slug'),
+    'rating': ('rating_sum', 'rating_count'),
+    'review_count': ('rating_count',),
+    'score_histogram': SCORE_FIELDS,
+    'name': ('name',),
+    'year': ('year',),
+    'description': ('description',),
+}
+# Поля TitleSerializer по умолчанию, без optional_fields.
+TITLE_FIELDS = tuple(field for field in TITLE_COLUMNS
+                     if field not in TitleSerializer.Meta.optional_fields)
+# Сколько id произведений подставлять в один IN при выборке жанров.
+GENRE_LOOKUP_BATCH = 500
+
+
+def title_values(queryset, fields=None, extra=()):
+    """Только колонки, нужные полям fields (по умолчанию TITLE_FIELDS)."""
+    columns = {'id': None}
+    for field in fields or TITLE_FIELDS:
+        columns.update(dict.fromkeys(TITLE_COLUMNS[field]))
+    columns.update(dict.fromkeys(extra))
+    return queryset.values(*columns)
+
+
+def title_genres(title_ids):
+    """{title_id: [жанры]} одним запросом на пачку id."""
+    genres = {title_id: [] for title_id in title_ids}
+    title_ids = list(genres)
+    for start in range(0, len(title_ids), GENRE_LOOKUP_BATCH):
+        links = Title.genre.through.objects.filter(
+            title_id__in=title_ids[start:start + GENRE_LOOKUP_BATCH]
+        ).values_list('title_id', 'genre__name', 'genre_id', 'genre__slug')
+        for title_id, name, genre_id, slug in links:
+            genres[title_id].append((name, genre_id, slug))
+    # Сортировка как у Genre.Meta.ordering, но в Python: в SQL она
+    # требовала бы временного B-дерева на каждую страницу.
+    return {
+        title_id: [{'name': name, 'slug': slug}
+                   for name, _, slug in sorted(items)]
+        for title_id, items in genres.items()
+    }
+
+
+def title_field(row, field, genres):
+    if field == 'genre':
+        return genres[row['id']]
+    if field == 'category':
+        return {'name': row['category__name'] or '',
+                'slug': row['category__slug'] or ''}
+    if field == 'rating':
+        return (row['rating_sum'] / row['rating_count']
+                if row['rating_count'] else None)
+    if field == 'review_count':
+        return row['rating_count']
+    if field == 'score_histogram':
+        return {str(score): row[name]
+                for score, name in zip(SCORES, SCORE_FIELDS)}
+    return row[field]
+
+
+def represent_titles(rows, fields=None):
+    """То же, что TitleSerializer(many=True).data, из строк title_values().
+
+    Порядок ключей и типы значений совпадают с TitleSerializer, поэтому
+    JSON получается побайтно таким же. fields — подмножество полей в
+    порядке TITLE_COLUMNS (по умолчанию TITLE_FIELDS); жанры
+    запрашиваются, только если нужны.
+    """
+    fields = fields or TITLE_FIELDS
+    rows = list(rows)
+    genres = (title_genres(row['id'] for row in rows)
+              if 'genre' in fields else None)
+    return [{field: title_field(row, field, genres) for field in fields}
+            for row in rows]
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -61,7 +160,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = '__all__'
+        exclude = ('updated_at',)
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -71,7 +170,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ('updated_at',)
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -81,11 +180,43 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         super().__init__(*args, **kwargs)
         self.fields['password'].required = False
 
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
-        attrs['password'] = self.context['request'].data.get(
-            'confirmation_code')
-        return super().validate(attrs)
+        self.user = verify_code(
+            attrs[self.username_field],
+            self.context['request'].data.get('confirmation_code')
+        )
+        if self.user is None or not self.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+        refresh = self.get_token(self.user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
 
 
 class GetOTPSerializer(serializers.Serializer):
     email = serializers.EmailField()
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    year_from = serializers.IntegerField(required=False)
+    year_to = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField(allow_null=True)
+    slug = serializers.SlugField(allow_null=True)
+    name = serializers.CharField()
@@ -0,0 +1,189 @@
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import ranking, search
+from .cache import bump_version
+from .models import (Category, Comment, CustomUser, Genre, Review, Title,
+                     score_field)
+
+TOKEN_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+
+def average(total, count):
+    """SQL-выражение total / count; NULL, если count = 0."""
+    return ExpressionWrapper(Cast(total, FloatField()) / NullIf(count, 0),
+                             output_field=FloatField())
+
+
+def change_rating(title_id, added=None, removed=None):
+    """Учитывает в счётчиках произведения новую и/или снятую оценку."""
+    changes = {'updated_at': timezone.now()}
+    for score, delta in ((added, 1), (removed, -1)):
+        if score is None:
+            continue
+        for field, value in (('rating_sum', score * delta),
+                             ('rating_count', delta),
+                             (score_field(score), delta)):
+            changes[field] = changes.get(field, F(field)) + value
+    changes['rating_avg'] = average(changes['rating_sum'],
+                                    changes['rating_count'])
+    Title.objects.filter(pk=title_id).update(**changes)
+    ranking.refresh_title(title_id)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw, **kwargs):
+    instance._previous_score = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_score = sender.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_score', None)
+    if previous is None:
+        change_rating(instance.title_id, added=instance.score)
+    elif previous['title_id'] == instance.title_id:
+        if previous['score'] != instance.score:
+            change_rating(instance.title_id, added=instance.score,
+                          removed=previous['score'])
+    else:
+        change_rating(previous['title_id'], removed=previous['score'])
+        change_rating(instance.title_id, added=instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    change_rating(instance.title_id, removed=instance.score)
+
+
+def change_comment_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + delta,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def add_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    change_comment_count(instance.review_id, -1)
+
+
+def touch_titles(titles):
+    """Сдвигает updated_at произведений, чьи вложенные данные изменились.
+
+    Жанры и категория входят в запись произведения в выгрузке
+    (api.export), поэтому их изменение должно попасть в updated_since.
+    """
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def touch_renamed(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        touch_titles(instance.titles.all())
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def touch_before_delete(sender, instance, **kwargs):
+    touch_titles(instance.titles.all())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_regenred(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        touch_titles(instance.titles.all())
+    elif action == 'post_clear' and not reverse:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        pks = pk_set if reverse else [instance.pk]
+        touch_titles(Title.objects.filter(pk__in=pks))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_titles(sender, **kwargs):
+    bump_version('titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    bump_version('genres')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_version('categories')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews(sender, **kwargs):
+    bump_version('reviews')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, **kwargs):
+    bump_version('comments')
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw, **kwargs):
+    search.index_titles([instance])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    search.unindex_title(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_ranking(sender, instance, created, raw, **kwargs):
+    # У нового произведения нет отзывов, а значит и строки рейтинга.
+    if raw or created:
+        return
+    ranking.refresh_title(instance.pk)
+
+
+@receiver(pre_save, sender=CustomUser)
+def bump_token_version(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values(
+        'token_version', *TOKEN_FIELDS).first()
+    if previous is None:
+        return
+    if any(previous[field] != getattr(instance, field)
+           for field in TOKEN_FIELDS):
+        instance.token_version = previous['token_version'] + 1
+        bump_version('users')
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_tokens(sender, instance, **kwargs):
+    bump_version('users')
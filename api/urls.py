@@ -3,9 +3,10 @@ from rest_framework.authtoken import views
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    GetOTPApiView, MyTokenObtainPairView, ReviewViewSet,
-                    TitleViewSet, UserViewSet)
+from .views import (AutocompleteView, CategoryViewSet, CommentViewSet,
+                    ExportView, GenreViewSet, GetOTPApiView,
+                    MyTokenObtainPairView, ReviewViewSet, TitleViewSet,
+                    UserViewSet)
 
 router_v1 = DefaultRouter()
 
@@ -35,7 +36,53 @@ urlpatterns = [
         TokenRefreshView.as_view(),
         name='token_refresh'
     ),
-    path('v1/api-token-auth/', views.obtain_auth_token),
-    path('auth/email/', GetOTPApiView.as_view()),
+    path('v1/api-token-auth/', views.obtain_auth_token,
+         name='api_token_auth'),
+    path('auth/email/', GetOTPApiView.as_view(), name='get_otp'),
+    path('v1/autocomplete/', AutocompleteView.as_view(),
+         name='autocomplete'),
+    path('v1/export/', ExportView.as_view(), name='export'),
     path('v1/', include(router_v1.urls)),
 ]
+
+# Число запросов к базе на маршрут при холодном кеше для самого тяжёлого
+# допустимого вида запроса (фильтры и фасеты списка, PATCH с жанрами
+# и категорией, каскадное удаление), включая загрузку пользователя для
+# токена без claim'ов. Число на метод или одно на все. Виды запросов
+# перечислены в tests/test_20_query_budget.py.
+WORST_CASE_QUERIES = {
+    'api-root': 1,
+    'token_obtain_pair': 3,
+    'token_refresh': 1,
+    'api_token_auth': 3,
+    'get_otp': 10,
+    'autocomplete': 5,
+    'export': 5,
+    'Users-list': {'GET': 3, 'POST': 4},
+    'Users-detail': {'GET': 2, 'DELETE': 11, 'default': 5},
+    'Users-me': {'GET': 1, 'PATCH': 3},
+    'category-list': {'GET': 4, 'default': 5},
+    'category-detail': 8,
+    'genre-list': {'GET': 4, 'default': 5},
+    'genre-detail': 7,
+    'titles-list': {'GET': 8, 'POST': 15},
+    'titles-detail': {'GET': 4, 'default': 21},
+    'titles-top': 5,
+    'reviews-list': {'GET': 5, 'POST': 12},
+    'reviews-detail': {'GET': 4, 'default': 15},
+    'comments-list': {'GET': 5, 'POST': 7},
+    'comments-detail': {'GET': 4, 'default': 7},
+}
+
+# Запас сверх худшего случая: бюджет не должен срабатывать от запроса,
+# которого нет в тестах, но лишний запрос в цикле его превысит.
+QUERY_BUDGET_HEADROOM = 2
+
+# Бюджет запросов на маршрут. Проверяется в tests/test_20_query_budget.py,
+# в DEBUG — в заголовках ответа (api.middleware.QueryCountMiddleware).
+QUERY_BUDGETS = {
+    name: ({method: count + QUERY_BUDGET_HEADROOM
+            for method, count in worst.items()}
+           if isinstance(worst, dict) else worst + QUERY_BUDGET_HEADROOM)
+    for name, worst in WORST_CASE_QUERIES.items()
+}
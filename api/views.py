@@ -1,10 +1,10 @@
-import random
-
 from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
-from django.db import models
-from django.db.models import Avg
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (filters, permissions, serializers,
                             status, viewsets)
 from rest_framework.decorators import action
@@ -13,15 +13,25 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .filters import TitleFilter
-from .mixins import DeleteViewSet
+from . import autocomplete, export, facets, ranking
+from .authentication import load_user
+from .filters import TitleFilter, TitleOrderingFilter, TitleSearchFilter
+from .mixins import (CachedListMixin, CachedRetrieveMixin, DeleteViewSet,
+                     SparseFieldsMixin, StreamingListMixin, ValuesReadMixin)
 from .models import Category, CustomUser, Genre, Review, Title
+from .otp import issue_code
+from .outbox import enqueue_email
+from .pagination import CachedCountKeysetPagination, OptionalKeysetPagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsOwnerOrReadOnly)
-from .serializers import (AdminUserSerializer, CategorySerializer,
-                          CommentSerializer, GenreSerializer, GetOTPSerializer,
+from .renderers import FastJSONRenderer, NDJSONRenderer
+from .search import search_titles
+from .serializers import (AdminUserSerializer, AutocompleteSerializer,
+                          CategorySerializer, CommentSerializer,
+                          GenreSerializer, GetOTPSerializer,
                           MyTokenObtainPairSerializer, ReviewSerializer,
-                          TitleSerializer, UserSerializer)
+                          TitleSerializer, TopTitlesQuerySerializer,
+                          UserSerializer, represent_titles, title_values)
 
 
 EMAIL_ADDRESS_EXAMPLE = 'from@example.com'
@@ -33,24 +43,72 @@ class GetOTPApiView(APIView):
     def post(self, request):
         serializer = GetOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        code = random.randint(1111, 9999)
         email = serializer.validated_data['email']
-        send_mail(
-            'Регистрация на Yamdb!',
-            f'Ваш код регистрации - {code}',
-            '{EMAIL_ADDRESS_EXAMPLE}',
-            [email]
+        with transaction.atomic():
+            user, _ = CustomUser.objects.get_or_create(
+                email=email,
+                defaults={
+                    'password': make_password(None)
+                }
+            )
+            code = issue_code(user)
+            enqueue_email(
+                'Регистрация на Yamdb!',
+                f'Ваш код регистрации - {code}',
+                EMAIL_ADDRESS_EXAMPLE,
+                email
+            )
+        return Response({'message': 'Check your email for verification code!'})
+
+
+class AutocompleteView(APIView):
+    permission_classes = (AllowAny,)
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+        serializer = AutocompleteSerializer(
+            autocomplete.suggest(query, limit), many=True
         )
-        user, created = CustomUser.objects.get_or_create(
-            email=email,
-            defaults={
-                'password': make_password(str(code))
-            }
+        return Response({'results': serializer.data})
+
+
+class ExportView(APIView):
+    """Весь каталог в NDJSON, ``?updated_since=`` — только изменения.
+
+    Отметку для следующего запроса возвращает заголовок X-Export-Watermark.
+    """
+    permission_classes = (IsAdmin,)
+    renderer_classes = (FastJSONRenderer, NDJSONRenderer)
+
+    def get(self, request):
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = export.parse_watermark(updated_since)
+            except ValueError:
+                raise serializers.ValidationError({'updated_since': [
+                    'Ожидаются дата или дата и время в формате ISO 8601'
+                ]})
+        watermark = timezone.now()
+        content = export.export_ndjson(updated_since or None)
+        gzipped = export.accepts_gzip(request)
+        if gzipped:
+            content = export.gzip_stream(content)
+        response = StreamingHttpResponse(
+            content, content_type=NDJSONRenderer.media_type
         )
-        if not created:
-            user.password = make_password(str(code))
-            user.save()
-        return Response({'message': 'Check your email for verification code!'})
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
@@ -66,11 +124,12 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(methods=('get', 'patch'), detail=False,
             permission_classes=(IsAuthenticated,))
     def me(self, request):
+        user = load_user(request.user)
         if request.method == 'GET':
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = UserSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -79,7 +138,8 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(DeleteViewSet):
+class CategoryViewSet(CachedListMixin, DeleteViewSet):
+    cache_dependencies = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [
@@ -89,7 +149,8 @@ class CategoryViewSet(DeleteViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(DeleteViewSet):
+class GenreViewSet(CachedListMixin, DeleteViewSet):
+    cache_dependencies = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (
@@ -107,51 +168,146 @@ class GenreViewSet(DeleteViewSet):
         return [permission() for permission in self.permission_classes]
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(CachedListMixin, CachedRetrieveMixin, SparseFieldsMixin,
+                   StreamingListMixin, ValuesReadMixin, viewsets.ModelViewSet):
+    cache_dependencies = ('titles', 'reviews')
     serializer_class = TitleSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAdminOrReadOnly)
+    filter_backends = [DjangoFilterBackend, TitleSearchFilter,
+                       TitleOrderingFilter]
     filterset_class = TitleFilter
+    pagination_class = CachedCountKeysetPagination
+    cache_resource = 'titles'
+    facet_names = None
+
+    def get_count_queryset(self):
+        return self.filter_queryset(Title.objects.all())
+
+    def paginate_queryset(self, queryset):
+        # Релевантность поиска не колонка, курсор по ней не построить;
+        # молча листать такой поиск по id было бы хуже явной ошибки.
+        # Другой порядок поиску не задать (TitleOrderingFilter).
+        if (self.paginator.use_keyset(self.request)
+                and self.request.query_params.get(
+                    TitleSearchFilter.search_param, '').strip()):
+            raise serializers.ValidationError({'pagination': [
+                'Курсор не сохраняет порядок релевантности поиска: '
+                'используйте limit/offset.'
+            ]})
+        return super().paginate_queryset(queryset)
 
     def get_queryset(self):
-        return Title.objects.select_related(
-            'category'
-        ).prefetch_related(
-            'genre'
-        ).all().annotate(
-            rating=Avg('reviews__score', output_field=models.DecimalField())
-        ).order_by('pk')
+        queryset = Title.objects.order_by('pk')
+        if self.action in ('list', 'retrieve'):
+            return queryset
+        return queryset.select_related('category').prefetch_related('genre')
+
+    def read_rows(self, queryset):
+        # Колонки сортировки нужны курсору, даже если их нет в fields.
+        ordering = TitleOrderingFilter().get_ordering(self.request)
+        return title_values(queryset, self.get_requested_fields(),
+                            extra=[name.lstrip('-') for name in ordering])
+
+    def filter_titles(self, params):
+        queryset = TitleFilter(params, queryset=Title.objects.all(),
+                               request=self.request).qs
+        query = params.get(TitleSearchFilter.search_param, '').strip()
+        return search_titles(queryset, query) if query else queryset
+
+    def get_facet_names(self):
+        value = self.request.query_params.get('facets')
+        if not value:
+            return None
+        try:
+            return facets.parse_facets(value)
+        except ValueError as error:
+            raise serializers.ValidationError({'facets': [
+                'Неизвестные фасеты: {}'.format(', '.join(error.args[0]))
+            ]})
+
+    def list(self, request, *args, **kwargs):
+        # Проверяем до выбора между обычным и потоковым ответом и до кеша.
+        self.facet_names = self.get_facet_names()
+        return super().list(request, *args, **kwargs)
+
+    def get_extra_data(self):
+        if not self.facet_names:
+            return {}
+        return {'facets': {
+            name: facets.facet_counts(name, self.request.query_params,
+                                      self.filter_titles)
+            for name in self.facet_names
+        }}
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовской оценке (api.ranking)."""
+        return self.cached_response(self.get_top, request)
+
+    def get_top(self, request):
+        query = TopTitlesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ranked = ranking.top(**query.validated_data)
+        fields = self.get_requested_fields()
+        rows = {row['id']: row for row in title_values(
+            Title.objects.filter(pk__in=[pk for pk, _ in ranked]), fields)}
+        ranked = [(pk, score) for pk, score in ranked if pk in rows]
+        titles = represent_titles([rows[pk] for pk, _ in ranked], fields)
+        for title, (_, score) in zip(titles, ranked):
+            title['score'] = round(score, 3)
+        return Response(titles)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data.update(self.get_extra_data())
+        return response
+
+    def represent_rows(self, rows):
+        return represent_titles(rows, self.get_requested_fields())
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(CachedListMixin, CachedRetrieveMixin, SparseFieldsMixin,
+                    StreamingListMixin, viewsets.ModelViewSet):
+    cache_dependencies = ('reviews', 'comments')
+    field_relations = {'author': 'author'}
+    deferrable_fields = ('text',)
+    cache_responses = False
     serializer_class = ReviewSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly
     )
+    pagination_class = OptionalKeysetPagination
 
     def get_queryset(self):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.shape_queryset(title.reviews.all())
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
         if Review.objects.filter(title=title,
-                                 author=self.request.user
+                                 author_id=self.request.user.pk
                                  ).exists():
             raise serializers.ValidationError('Можно оставить только 1')
-        serializer.save(title=title, author=self.request.user)
+        serializer.save(title=title, author_id=self.request.user.pk)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CachedListMixin, CachedRetrieveMixin, SparseFieldsMixin,
+                     StreamingListMixin, viewsets.ModelViewSet):
+    cache_dependencies = ('comments',)
+    field_relations = {'author': 'author'}
+    deferrable_fields = ('text',)
+    cache_responses = False
     serializer_class = CommentSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
+    pagination_class = OptionalKeysetPagination
 
     def get_queryset(self):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return self.shape_queryset(review.comments.all())
 
     def perform_create(self, serializer):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(review=review, author=self.request.user)
+        serializer.save(review=review, author_id=self.request.user.pk)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +86,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -111,6 +118,12 @@ AUTHENTICATION_BACKENDS = ('api.backends.EmailBackend', )
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+OTP_TTL = timedelta(minutes=15)
+OTP_MAX_ATTEMPTS = 5
+
+# Вес априорной средней в байесовском рейтинге /titles/top/ (в отзывах).
+RANKING_PRIOR_VOTES = 10
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -137,7 +150,10 @@ REST_FRAMEWORK = {
         ('rest_framework.permissions.IsAuthenticated',
             'rest_framework.permissions.BasePermission', ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication', ),
+        'api.authentication.StatelessJWTAuthentication', ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer', ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
@@ -148,3 +164,8 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=5),
 }
+
+# Сколько хранить версию токена пользователя в кеше. На отзыв токенов
+# не влияет: ключ включает версию users из базы и меняется во всех
+# процессах сразу после смены роли, блокировки или удаления.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
@@ -0,0 +1,4 @@
+"""Нагрузочные замеры эндпоинтов API на сгенерированных данных.
+
+Запуск: ``python -m benchmarks --titles 10000 --output results.json``.
+"""
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import platform
+import sys
+
+import django
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Замеры задержки эндпоинтов API (p50/p95/p99).'
+    )
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', nargs='*', default=None,
+                        help='Запустить только указанные сценарии.')
+    parser.add_argument('--cold-cache', action='store_true',
+                        help='Очищать кеш перед каждым запросом.')
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    parser.add_argument('--compare',
+                        help='Предыдущий JSON-отчёт для сравнения p50.')
+    parser.add_argument(
+        '--use-current-db', action='store_true',
+        help='Не создавать тестовую базу, мерить на текущей.'
+    )
+    parser.add_argument('--keepdb', action='store_true')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--reviews-per-title', type=float, default=20)
+    parser.add_argument('--comments-per-review', type=float, default=1)
+    parser.add_argument('--zipf', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def run(args):
+    from django.core.management import call_command
+
+    from . import runner, scenarios
+
+    if not args.use_current_db:
+        call_command(
+            'generate_data', users=args.users, titles=args.titles,
+            reviews_per_title=args.reviews_per_title,
+            comments_per_review=args.comments_per_review,
+            zipf=args.zipf, seed=args.seed, stdout=sys.stderr,
+        )
+    results = {}
+    for name, request in scenarios.build(args.iterations, args.warmup):
+        if args.only and name not in args.only:
+            continue
+        results[name] = runner.measure(request, args.iterations,
+                                       args.warmup, args.cold_cache)
+        print(f'{name:40} p50 {results[name]["p50_ms"]:>9} ms  '
+              f'p99 {results[name]["p99_ms"]:>9} ms  '
+              f'queries {results[name]["queries"]}', file=sys.stderr)
+    return {
+        'meta': {
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'cold_cache': args.cold_cache,
+            'dataset': None if args.use_current_db else {
+                'users': args.users, 'titles': args.titles,
+                'reviews_per_title': args.reviews_per_title,
+                'comments_per_review': args.comments_per_review,
+                'zipf': args.zipf, 'seed': args.seed,
+            },
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    django.setup()
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    from . import runner
+
+    setup_test_environment()
+    database_name = connection.settings_dict['NAME']
+    if not args.use_current_db:
+        connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        report = run(args)
+    finally:
+        if not args.use_current_db and not args.keepdb:
+            connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as previous:
+            report['p50_ratio'] = runner.compare(report, json.load(previous))
+    if args.output:
+        runner.dump(report, args.output)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2,
+                         sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
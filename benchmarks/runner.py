@@ -0,0 +1,64 @@
+import json
+import math
+import statistics
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(request, iterations, warmup=1, cold_cache=False):
+    """Вызывает request() несколько раз и собирает статистику.
+
+    request — функция без аргументов, возвращающая ответ тестового
+    клиента; каждый её вызов — один запрос к API. С cold_cache кеш
+    очищается перед каждым запросом (вне замера).
+    """
+    for _ in range(warmup):
+        request()
+    timings, queries, statuses = [], [], set()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if cold_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            begin = time.perf_counter()
+            response = request()
+            timings.append(time.perf_counter() - begin)
+        queries.append(len(context.captured_queries))
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+    return {
+        'iterations': iterations,
+        'status': sorted(statuses),
+        'throughput_rps': round(iterations / elapsed, 2),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+def compare(current, previous):
+    """Отношение p50 текущего прогона к предыдущему по каждому сценарию."""
+    ratios = {}
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if before and before['p50_ms']:
+            ratios[name] = round(result['p50_ms'] / before['p50_ms'], 3)
+    return ratios
+
+
+def dump(report, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2,
+                  sort_keys=True)
@@ -0,0 +1,187 @@
+import itertools
+import math
+
+from django.db.models import Count
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import add_user_claims
+from api.filters import TitleFilter
+from api.models import Category, CustomUser, Genre, Review, Title
+from api.otp import issue_code
+from api.serializers import TitleSerializer, represent_titles, title_values
+
+TITLES_URL = '/api/v1/titles/'
+REVIEWS_URL = TITLES_URL + '{title_id}/reviews/'
+COMMENTS_URL = REVIEWS_URL + '{review_id}/comments/'
+AUTOCOMPLETE_URL = '/api/v1/autocomplete/'
+OTP_URL = '/api/auth/email/'
+TOKEN_URL = '/api/v1/auth/token/'
+BENCH_CODE = '1234'
+# Полуширина диапазона лет в сценариях year_min/year_max.
+YEAR_SPAN = 10
+
+
+def auth_client(user):
+    client = APIClient(raise_request_exception=False)
+    token = add_user_claims(RefreshToken.for_user(user), user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def bench_user(name, **extra):
+    user, _ = CustomUser.objects.get_or_create(
+        email=f'{name}@bench.fake', defaults={'username': name, **extra}
+    )
+    return user
+
+
+def filter_values(title):
+    """Параметры для каждого фильтра TitleFilter, взятые у реального title.
+
+    Ключ — суффикс имени сценария. Многозначные жанр и категория берут
+    второе значение у соседних жанров и категорий, диапазоны лет —
+    вокруг года title.
+    """
+    genres = list(title.genre.values_list('slug', flat=True)[:2])
+    if len(genres) == 1:
+        genres += Genre.objects.exclude(slug=genres[0]).values_list(
+            'slug', flat=True)[:1]
+    categories = []
+    if title.category:
+        categories = [title.category.slug, *Category.objects.exclude(
+            pk=title.category_id).values_list('slug', flat=True)[:1]]
+    values = {
+        'category': {'category': categories[:1]},
+        'category_multi': {'category': categories},
+        'genre': {'genre': genres[:1]},
+        'genre_any': {'genre': genres},
+        'genre_all': {'genre': genres, 'genre_match': 'all'},
+        'name': {'name': title.name[:len(title.name) // 2 or 1]},
+        'year': {'year': title.year},
+    }
+    if title.year is not None:
+        values.update({
+            'year_min': {'year_min': title.year - YEAR_SPAN},
+            'year_max': {'year_max': title.year + YEAR_SPAN},
+            'year_range': {'year_min': title.year - YEAR_SPAN,
+                           'year_max': title.year + YEAR_SPAN},
+        })
+    result = {}
+    for name, params in values.items():
+        params = {
+            param: ','.join(value) if isinstance(value, list) else value
+            for param, value in params.items()
+        }
+        if all(param in TitleFilter.base_filters and value not in (None, '')
+               for param, value in params.items()):
+            result[name] = params
+    return result
+
+
+def get(client, url, params=None):
+    return lambda: client.get(url, params or {})
+
+
+def build(iterations, warmup):
+    """Список сценариев (имя, функция-запрос) для текущей базы."""
+    anonymous = APIClient(raise_request_exception=False)
+    admin = bench_user('bench_admin', is_staff=True, is_superuser=True,
+                       role='admin')
+    admin_client = auth_client(admin)
+
+    title = Title.objects.order_by('-rating_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comments_total=Count('comments')
+    ).order_by('-comments_total', 'pk').first()
+    if title is None or review is None:
+        raise ValueError('Нужны произведения с отзывами, '
+                         'сначала запустите generate_data')
+    title_url = f'{TITLES_URL}{title.pk}/'
+    reviews_url = REVIEWS_URL.format(title_id=title.pk)
+    comments_url = COMMENTS_URL.format(title_id=title.pk,
+                                       review_id=review.pk)
+
+    scenarios = [
+        ('titles_list', get(anonymous, TITLES_URL)),
+    ]
+    for name, params in filter_values(title).items():
+        scenarios.append((f'titles_list_filter_{name}',
+                          get(anonymous, TITLES_URL, params)))
+    scenarios += [
+        ('titles_list_ordered', get(anonymous, TITLES_URL,
+                                    {'ordering': '-rating'})),
+        ('titles_list_ordered_cursor', get(anonymous, TITLES_URL, {
+            'ordering': '-rating', 'pagination': 'cursor'})),
+        ('titles_search', get(anonymous, TITLES_URL,
+                              {'search': title.name})),
+        ('autocomplete', get(anonymous, AUTOCOMPLETE_URL,
+                             {'q': title.name[:3]})),
+        ('title_detail', get(anonymous, title_url)),
+        ('reviews_list', get(anonymous, reviews_url)),
+        ('reviews_list_cursor', get(anonymous, reviews_url,
+                                    {'pagination': 'cursor'})),
+        ('review_create', review_create(iterations + warmup)),
+        ('comments_list', get(anonymous, comments_url)),
+        ('comment_create', lambda: admin_client.post(
+            comments_url, {'text': 'benchmark'})),
+        ('otp_issue', otp_issue(anonymous, iterations + warmup)),
+        ('token_obtain', token_obtain(anonymous, iterations + warmup)),
+    ]
+    scenarios += title_serialization()
+    return scenarios
+
+
+def title_serialization(page_size=100):
+    """Микробенчмарк: страница произведений через сериализатор и values()."""
+    renderer = JSONRenderer()
+    titles = Title.objects.order_by('pk')
+
+    def serializer():
+        page = titles.select_related('category').prefetch_related(
+            'genre')[:page_size]
+        data = TitleSerializer(page, many=True).data
+        return HttpResponse(renderer.render(data))
+
+    def values():
+        data = represent_titles(title_values(titles[:page_size]))
+        return HttpResponse(renderer.render(data))
+
+    return [('titles_serialize_drf', serializer),
+            ('titles_serialize_values', values)]
+
+
+def review_create(count):
+    """Каждый запрос — новая пара (автор, произведение)."""
+    title_ids = list(Title.objects.order_by('pk').values_list(
+        'pk', flat=True)[:count])
+    users = math.ceil(count / len(title_ids))
+    clients = [auth_client(bench_user(f'bench_reviewer{number}'))
+               for number in range(users)]
+    pairs = itertools.product(clients, title_ids)
+
+    def request():
+        client, title_id = next(pairs)
+        return client.post(REVIEWS_URL.format(title_id=title_id),
+                           {'text': 'benchmark', 'score': 7})
+    return request
+
+
+def otp_issue(client, count):
+    """Повторная выдача кода уже зарегистрированным пользователям."""
+    emails = itertools.cycle(CustomUser.objects.order_by('pk').values_list(
+        'email', flat=True)[:count])
+    return lambda: client.post(OTP_URL, {'email': next(emails)})
+
+
+def token_obtain(client, count):
+    """Коды одноразовые, поэтому на каждый запрос — свой пользователь."""
+    logins = []
+    for number in range(count):
+        user = bench_user(f'bench_login{number}')
+        issue_code(user, BENCH_CODE)
+        logins.append({'email': user.email, 'confirmation_code': BENCH_CODE})
+    logins = iter(logins)
+    return lambda: client.post(TOKEN_URL, next(logins))
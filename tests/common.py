@@ -113,3 +113,27 @@ def create_comments(user_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def count_queries(client, method, url, data=None):
+    """Число запросов к базе на один HTTP-запрос с холодным кешем."""
+    from django.core.cache import cache
+
+    from api.middleware import QueryCounter
+
+    cache.clear()
+    with QueryCounter() as counter:
+        response = getattr(client, method.lower())(url, data=data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return response, counter.count
+
+
+def make_cursor(*values):
+    """Курсор с произвольной позицией, как его соберёт клиент вручную."""
+    import json
+    from base64 import b64encode
+    from urllib.parse import urlencode
+
+    query = urlencode({'p': json.dumps(list(values))})
+    return b64encode(query.encode('ascii')).decode('ascii')
@@ -1,4 +1,12 @@
+import pytest
+from django.core.cache import cache
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     # 'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Review, Title
+
+from .common import create_reviews
+
+
+class Test07Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_counters(self, user_client, admin):
+        reviews, titles, user, _ = create_reviews(user_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются '
+            '`rating_sum` и `rating_count` произведения'
+        )
+        review = Review.objects.get(pk=reviews[1]['id'])
+        review.score = 9
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что при изменении оценки обновляется `rating_sum`'
+        )
+        response = user_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что при удалении отзыва обновляются счётчики рейтинга'
+        )
+        user.delete()
+        title.refresh_from_db()
+        assert title.rating == 4, (
+            'Проверьте, что каскадное удаление отзывов обновляет рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalc_ratings(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating_sum=0, rating_count=0
+        )
+        out = StringIO()
+        call_command('recalc_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений: 1' in out.getvalue()
+        assert Title.objects.get(pk=titles[0]['id']).rating is None
+        call_command('recalc_ratings', stdout=StringIO())
+        assert Title.objects.get(pk=titles[0]['id']).rating == 4
@@ -0,0 +1,35 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Comment, CustomUser, Genre, Review, Title
+
+
+class Test08LoadCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_csv(self):
+        out = StringIO()
+        call_command('load_csv', stdout=out)
+        assert 'review.csv: 73 (пропущено дублей: 2)' in out.getvalue(), (
+            'Проверьте, что `load_csv` пропускает повторные отзывы '
+            'одного автора на произведение'
+        )
+        assert CustomUser.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Genre.objects.count() == 15
+        assert Review.objects.filter(pub_date__year__lt=2021).count() == 73, (
+            'Проверьте, что `load_csv` сохраняет `pub_date` из файла'
+        )
+        assert Comment.objects.exists()
+        title = Title.objects.get(pk=1)
+        assert title.name == 'Побег из Шоушенка'
+        assert title.genre.filter(slug='drama').exists()
+        assert title.rating_count == title.reviews.count() > 0, (
+            'Проверьте, что после загрузки пересчитывается рейтинг'
+        )
+        user = CustomUser.objects.get(pk=100)
+        assert user.username == 'bingobongo'
+        assert not user.has_usable_password()
+        Title.objects.create(name='Новое', year=2000, description='')
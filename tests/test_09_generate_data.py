@@ -0,0 +1,57 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command, load_command_class
+
+from api.models import Comment, CustomUser, Review, Title
+
+
+class Test09GenerateData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_data(self):
+        call_command(
+            'generate_data', '--users=50', '--titles=40', '--genres=5',
+            '--reviews-per-title=5', '--comments-per-review=1', '--zipf=1.2',
+            '--seed=7', '--batch-size=100', stdout=StringIO()
+        )
+        assert CustomUser.objects.count() == 50
+        assert Title.objects.count() == 40
+        counts = list(Title.objects.order_by('pk').values_list(
+            'rating_count', flat=True))
+        assert counts[0] > counts[-1], (
+            'Проверьте, что популярность произведений убывает по Ципфу'
+        )
+        assert sum(counts) == Review.objects.count() > 0
+        assert Comment.objects.exists()
+        out = StringIO()
+        call_command('recalc_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений: 0' in out.getvalue(), (
+            'Проверьте, что `generate_data` заполняет счётчики рейтинга'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bounded_batches(self, monkeypatch):
+        command = load_command_class('api', 'generate_data')
+        sizes = []
+        flush = command.flush
+
+        def recording_flush(reviews, comments, counters):
+            sizes.append((len(reviews) + len(comments), len(counters)))
+            flush(reviews, comments, counters)
+
+        monkeypatch.setattr(command, 'flush', recording_flush)
+        call_command(
+            command, '--users=5', '--titles=200', '--genres=0',
+            '--categories=0', '--reviews-per-title=0.2',
+            '--comments-per-review=0', '--zipf=2', '--seed=3',
+            '--batch-size=10', stdout=StringIO()
+        )
+        assert all(pending <= 10 and counters <= 10
+                   for pending, counters in sizes), (
+            'Проверьте, что память `generate_data` ограничена размером пачки'
+        )
+        assert Title.objects.filter(rating_count=0).exists()
+        out = StringIO()
+        call_command('recalc_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений: 0' in out.getvalue()
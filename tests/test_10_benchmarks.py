@@ -0,0 +1,36 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from benchmarks import runner, scenarios
+
+
+class Test10Benchmarks:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_scenarios_smoke(self):
+        call_command('generate_data', '--users=10', '--titles=10',
+                     '--seed=3', stdout=StringIO())
+        names = set()
+        for name, request in scenarios.build(iterations=2, warmup=1):
+            result = runner.measure(request, iterations=2, warmup=1,
+                                    cold_cache=True)
+            names.add(name)
+            assert max(result['status']) < 400, (
+                f'Сценарий `{name}` вернул статус {result["status"]}'
+            )
+            assert result['p50_ms'] <= result['p99_ms']
+            assert result['queries'] >= 1
+        assert {'titles_list', 'titles_list_filter_genre', 'title_detail',
+                'titles_list_filter_genre_all',
+                'titles_list_filter_category_multi',
+                'titles_list_filter_year_range',
+                'reviews_list', 'review_create', 'comment_create',
+                'otp_issue', 'token_obtain'} <= names
+
+    def test_02_percentile(self):
+        values = list(range(1, 101))
+        assert runner.percentile(values, 50) == 50
+        assert runner.percentile(values, 99) == 99
+        assert runner.percentile([5], 95) == 5
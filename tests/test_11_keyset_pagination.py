@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Review, Title
+
+from .common import make_cursor
+
+
+class Test11KeysetPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client):
+        call_command('generate_data', '--users=30', '--titles=1',
+                     '--reviews-per-title=30', '--comments-per-review=0',
+                     '--zipf=0', '--seed=5', stdout=StringIO())
+        title = Title.objects.get()
+        expected = list(Review.objects.filter(title=title).order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        assert len(expected) == 30
+
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor&limit=7'
+        seen, pages = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            assert not any('COUNT(' in query['sql']
+                           for query in context.captured_queries), (
+                'Проверьте, что курсорная пагинация не выполняет COUNT'
+            )
+            data = response.json()
+            assert 'count' not in data
+            pages.append(data)
+            seen += [review['id'] for review in data['results']]
+            url = data['next']
+        assert seen == expected, (
+            'Проверьте, что курсорная пагинация отдаёт отзывы '
+            'по (pub_date, id) без пропусков и повторов'
+        )
+
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results'], (
+            'Проверьте ссылку `previous` курсорной пагинации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_default_and_invalid_cursor(self, client):
+        call_command('generate_data', '--users=3', '--titles=1',
+                     '--reviews-per-title=3', '--zipf=0', '--seed=5',
+                     stdout=StringIO())
+        title = Title.objects.get()
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(url).json()['count'] == 3, (
+            'Без `pagination=cursor` должна остаться пагинация limit/offset'
+        )
+        assert client.get(url + '?cursor=bad').status_code == 404
+        for position in (['bad', 1], ['2020-01-01T00:00:00', 'x'],
+                         [None, 1], [[1], 1], ['2020-01-01T00:00:00']):
+            response = client.get(url, {'pagination': 'cursor',
+                                        'cursor': make_cursor(*position)})
+            assert response.status_code == 404, position
+        response = client.get(url, {'cursor': make_cursor(
+            '2999-01-01T00:00:00+00:00', 0)})
+        assert len(response.json()['results']) == 3
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        data = client.get(url).json()
+    counts = [query for query in context.captured_queries
+              if 'COUNT(' in query['sql']]
+    return data, counts
+
+
+class Test12TitleCount:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_count(self, client, user_client):
+        titles, _, genres = create_titles(user_client)
+        url = f'/api/v1/titles/?genre={genres[0]["slug"]}'
+        data, counts = count_queries(client, url)
+        assert data['count'] == 1
+        assert len(counts) == 1
+        assert 'GROUP BY' not in counts[0]['sql'], (
+            'Проверьте, что count считается без аннотаций'
+        )
+        data, counts = count_queries(client, url + '&limit=1&offset=0')
+        assert data['count'] == 1
+        assert not counts, (
+            'Проверьте, что count кешируется для того же набора фильтров'
+        )
+
+        user_client.post('/api/v1/titles/', data={
+            'name': 'Ещё', 'year': 2001, 'genre': [genres[0]['slug']],
+            'category': 'films', 'description': '-'
+        })
+        data, counts = count_queries(client, url)
+        assert data['count'] == 2, (
+            'Проверьте, что кеш count сбрасывается при изменении произведений'
+        )
+        user_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={
+            'genre': [genres[0]['slug']]
+        })
+        assert client.get(url).json()['count'] == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_estimate(self, client, user_client):
+        create_titles(user_client)
+        data, counts = count_queries(client, '/api/v1/titles/?count=estimate')
+        assert data['count'] >= 2
+        assert not counts, (
+            'Проверьте, что `count=estimate` не выполняет COUNT(*)'
+        )
+        data = client.get('/api/v1/titles/?count=estimate&year=2000').json()
+        assert data['count'] == 1, (
+            'С фильтрами `count=estimate` должен считать точно'
+        )
@@ -0,0 +1,70 @@
+import tempfile
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews, create_titles
+
+
+def get(client, url):
+    """Ответ и число запросов к базе, кроме одного чтения версий."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    queries = [query['sql'] for query in context.captured_queries]
+    versions = [sql for sql in queries if '"api_resourceversion"' in sql]
+    assert len(versions) == 1, 'Версии должны читаться одним запросом'
+    return response.json(), len(queries) - len(versions)
+
+
+class Test13ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cached_and_invalidated(self, client, user_client,
+                                              admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        data, queries = get(client, url)
+        assert data['rating'] == 4
+        cached, queries = get(client, url)
+        assert cached == data
+        assert queries == 0, (
+            'Проверьте, что повторный GET произведения берётся из кеша'
+        )
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 8}
+        )
+        data, queries = get(client, url)
+        assert data['rating'] == 5, (
+            'Проверьте, что кеш произведения сбрасывается при изменении отзыва'
+        )
+
+        _, queries = get(client, '/api/v1/titles/?year=2000')
+        assert queries > 0
+        _, queries = get(client, '/api/v1/titles/?year=2000')
+        assert queries == 0
+        assert get(client, '/api/v1/titles/?year=2020')[1] > 0, (
+            'Проверьте, что ключ кеша учитывает query-параметры'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genres_file_cache(self, client, user_client):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                create_titles(user_client)
+                data, _ = get(client, '/api/v1/genres/')
+                assert get(client, '/api/v1/genres/') == (data, 0)
+                user_client.post('/api/v1/genres/',
+                                 data={'name': 'Мюзикл', 'slug': 'musical'})
+                data, _ = get(client, '/api/v1/genres/')
+                assert data['count'] == 4, (
+                    'Проверьте, что кеш жанров сбрасывается при создании жанра'
+                )
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from api.models import ResourceVersion
+
+from .common import create_comments
+
+
+def conditional_get(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    return response, len(context.captured_queries)
+
+
+class Test14ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_etag(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = (
+            f'/api/v1/titles/{title_id}/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.has_header('ETag') and response.has_header(
+                'Last-Modified'), (
+                f'Проверьте, что GET `{url}` возвращает ETag и Last-Modified'
+            )
+            response, queries = conditional_get(
+                client, url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            assert response.status_code == 304, (
+                f'Проверьте, что GET `{url}` с If-None-Match отдаёт 304'
+            )
+            assert queries == 1, (
+                'Проверьте, что для 304 читаются только версии ресурсов'
+            )
+            response, _ = conditional_get(
+                client, url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            assert response.status_code == 304
+
+        url = urls[-1]
+        etag = client.get(url)['ETag']
+        user_client.patch(f'{url}{comments[0]["id"]}/', data={'text': 'new'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения комментария ETag меняется'
+        )
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_validators_from_database(self, client, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        etag = client.get(url)['ETag']
+        # Запись в другом процессе: его локальный кеш не виден этому,
+        # но версия в базе общая.
+        ResourceVersion.objects.filter(resource='comments').update(
+            version=F('version') + 1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что ETag строится из версий в базе, а не в кеше'
+        )
+        assert response['ETag'] != etag
@@ -0,0 +1,55 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Title
+
+
+def search(client, query):
+    response = client.get('/api/v1/titles/', {'search': query})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+class Test15Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, client, user_client):
+        call_command('load_csv', stdout=StringIO())
+        assert search(client, 'шоушенк') == ['Побег из Шоушенка'], (
+            'Проверьте, что `search` ищет по префиксу без учёта регистра '
+            'для кириллицы'
+        )
+        assert search(client, 'ПОБЕГ шоушенка') == ['Побег из Шоушенка']
+        assert search(client, '"*') == []
+
+        Title.objects.create(name='Рассказ', year=2000,
+                             description='Про побег из тюрьмы')
+        names = search(client, 'побег')
+        assert names[0] == 'Побег из Шоушенка' and 'Рассказ' in names, (
+            'Проверьте, что совпадения в названии ранжируются выше описания'
+        )
+
+        title = Title.objects.get(name='Рассказ')
+        title.name = 'Бегство'
+        title.save()
+        assert search(client, 'бегство') == ['Бегство'], (
+            'Проверьте, что индекс обновляется при изменении произведения'
+        )
+        user_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert search(client, 'бегство') == []
+        assert client.get('/api/v1/titles/?search=побег').json()['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_resets_cache(self, client):
+        Title.objects.bulk_create([Title(name='Тайна', year=2000)])
+        assert search(client, 'тайна') == []
+        assert client.get('/api/v1/titles/', {'search': 'тайна'}).json()[
+            'count'] == 0
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert search(client, 'тайна') == ['Тайна'], (
+            'Проверьте, что после перестройки индекса кеш поиска сброшен'
+        )
+        assert client.get('/api/v1/titles/', {'search': 'тайна'}).json()[
+            'count'] == 1
@@ -0,0 +1,67 @@
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.autocomplete import Entry, PrefixIndex, word_keys
+from api.models import Genre
+
+
+def suggest(client, query, **params):
+    response = client.get('/api/v1/autocomplete/', {'q': query, **params})
+    assert response.status_code == 200, (
+        'Проверьте, что `/api/v1/autocomplete/` доступен без авторизации'
+    )
+    return [(item['type'], item['name'])
+            for item in response.json()['results']]
+
+
+class Test16Autocomplete:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_autocomplete(self, client):
+        call_command('load_csv', stdout=StringIO())
+        assert ('title', 'Побег из Шоушенка') in suggest(client, 'ПОБ'), (
+            'Проверьте, что подсказки ищут по префиксу без учёта регистра'
+        )
+        assert ('title', 'Побег из Шоушенка') in suggest(client, 'шоу'), (
+            'Проверьте, что подсказки ищут по началу любого слова'
+        )
+        assert ('genre', 'Драма') in suggest(client, 'др')
+        assert ('category', 'Фильм') in suggest(client, 'фил')
+        assert suggest(client, '') == []
+        assert len(suggest(client, 'с', limit=2)) == 2
+
+        Genre.objects.create(name='Драмеди', slug='dramedy')
+        assert ('genre', 'Драмеди') in suggest(client, 'драм'), (
+            'Проверьте, что индекс перестраивается после изменений'
+        )
+
+    def test_02_top_k_over_all_matches(self):
+        entries = [Entry('title', number, None, f'The a{number:03}', 1)
+                   for number in range(300)]
+        entries.append(Entry('title', 300, None, 'The Godfather', 100000))
+        entries.append(Entry('title', 301, None, 'The the end', 50))
+        index = PrefixIndex(entries)
+        assert [entry.name for entry in index.search('the', 3)] == [
+            'The Godfather', 'The the end', 'The a000'], (
+            'Проверьте, что top-k выбирается из всех совпадений по префиксу'
+        )
+
+        rng = random.Random(3)
+        words = ['ab', 'abc', 'b', 'ba', 'abd', 'c']
+        entries = [Entry('title', number, None,
+                         ' '.join(rng.choices(words, k=rng.randint(1, 3))),
+                         rng.randint(0, 5))
+                   for number in range(200)]
+        index = PrefixIndex(entries)
+        for prefix in ('a', 'ab', 'abc', 'b', 'c', 'x', 'ab b'):
+            expected = sorted(
+                (entry for entry in entries
+                 if any(key.startswith(prefix)
+                        for key in word_keys(entry.name))),
+                key=lambda entry: (-entry.weight, entry.name))[:7]
+            assert [(entry.weight, entry.name) for entry in index.search(
+                prefix, 7)] == [(entry.weight, entry.name)
+                                for entry in expected], prefix
@@ -0,0 +1,85 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from api.models import OutboxEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class Test17Outbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_otp_goes_through_outbox(self, client):
+        response = client.post('/api/auth/email/',
+                               data={'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что `/auth/email/` не отправляет письмо в запросе'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.to == 'new@yamdb.fake'
+        assert email.status == OutboxEmail.PENDING
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['new@yamdb.fake']
+        assert mail.outbox[0].from_email == 'from@example.com'
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert email.body == '', (
+            'Проверьте, что текст письма с кодом стирается после отправки'
+        )
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == 1, 'Письмо не должно уйти повторно'
+
+    @pytest.mark.django_db(transaction=True)
+    @override_settings(
+        EMAIL_BACKEND='tests.test_17_outbox.FailingBackend'
+    )
+    def test_02_retry_with_backoff(self):
+        email = OutboxEmail.objects.create(
+            subject='s', body='b', from_email='from@example.com',
+            to='user@yamdb.fake'
+        )
+        call_command('send_outbox', '--once', '--max-attempts=2',
+                     stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING
+        assert email.body == 'b', 'Текст нужен для повторной отправки'
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        assert 'SMTP' in email.last_error
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox', '--once', '--max-attempts=2',
+                     stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED
+        assert email.attempts == 2
+        assert email.body == ''
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_admin_hides_body(self, client, admin):
+        client.post('/api/auth/email/', data={'email': 'new@yamdb.fake'})
+        email = OutboxEmail.objects.get()
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        client.force_login(admin)
+        for url in ('/admin/api/outboxemail/',
+                    f'/admin/api/outboxemail/{email.pk}/change/'):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert email.body not in response.content.decode(), (
+                'Проверьте, что админка не показывает код из письма'
+            )
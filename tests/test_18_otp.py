@@ -0,0 +1,63 @@
+import re
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import CustomUser, OneTimeCode
+from api.otp import code_hash, issue_code
+
+
+def request_code(client, email):
+    client.post('/api/auth/email/', data={'email': email})
+    call_command('send_outbox', '--once', stdout=StringIO())
+    return re.search(r'\d+$', mail.outbox[-1].body).group()
+
+
+def obtain_token(client, email, code):
+    return client.post('/api/v1/auth/token/',
+                       data={'email': email, 'confirmation_code': code})
+
+
+class Test18OTP:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_otp_flow(self, client, admin):
+        password = admin.password
+        code = request_code(client, admin.email)
+        admin.refresh_from_db()
+        assert admin.password == password, (
+            'Проверьте, что выдача кода не перезаписывает пароль'
+        )
+        assert OneTimeCode.objects.get(user=admin).code_hash == code_hash(
+            admin.pk, code), 'Проверьте, что хранится HMAC кода, а не код'
+
+        response = obtain_token(client, admin.email, code)
+        assert response.status_code == 200
+        assert 'access' in response.json()
+        assert obtain_token(client, admin.email, code).status_code == 401, (
+            'Проверьте, что код подтверждения одноразовый'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_attempts_and_expiry(self, client, settings):
+        settings.OTP_MAX_ATTEMPTS = 2
+        user = CustomUser.objects.create(username='u', email='u@yamdb.fake')
+        code = issue_code(user, '1234')
+        assert obtain_token(client, user.email, '0000').status_code == 401
+        assert obtain_token(client, user.email, '0000').status_code == 401
+        assert obtain_token(client, user.email, code).status_code == 401, (
+            'Проверьте, что код блокируется после исчерпания попыток'
+        )
+
+        issue_code(user, '1234')
+        OneTimeCode.objects.update(expires_at=timezone.now()
+                                   - timedelta(seconds=1))
+        assert obtain_token(client, user.email, '1234').status_code == 401
+        out = StringIO()
+        call_command('cleanup_otp', stdout=out)
+        assert 'Удалено кодов: 1' in out.getvalue()
+        assert not OneTimeCode.objects.exists()
@@ -0,0 +1,91 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import CustomUser
+from api.otp import issue_code
+
+
+def login(user):
+    issue_code(user, '1234')
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'email': user.email, 'confirmation_code': '1234'})
+    assert response.status_code == 200
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {response.json()["access"]}')
+    return client, response.json()['access']
+
+
+def user_queries(queries):
+    table = CustomUser._meta.db_table
+    return [query for query in queries if table in query['sql']]
+
+
+class Test19StatelessJWT:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_claims_and_no_user_query(self, admin):
+        client, access = login(admin)
+        token = AccessToken(access)
+        assert token['role'] == admin.role
+        assert token['is_superuser'] is True
+        assert token['token_version'] == admin.token_version
+
+        client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert not user_queries(context.captured_queries), (
+            'Проверьте, что аутентификация не загружает пользователя из базы'
+        )
+
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['email'] == admin.email
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_tokens(self, admin):
+        user = CustomUser.objects.create(username='u', email='u@yamdb.fake',
+                                         role='moderator')
+        client, _ = login(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        user.bio = 'не влияет на токены'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        user.role = 'user'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена роли делает старые токены недействительными'
+        )
+        client, _ = login(user)
+        assert client.get('/api/v1/users/me/').json()['role'] == 'user'
+
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_revocation_from_another_process(self, admin):
+        user = CustomUser.objects.create(username='u', email='u@yamdb.fake',
+                                         role='moderator')
+        client, _ = login(user)
+        assert client.get('/api/v1/genres/').status_code == 200
+
+        # Другой процесс со своим локальным кешем: сигнал поднимает версию
+        # в базе, а кеш этого процесса остаётся нетронутым.
+        snapshot = dict(cache._cache), dict(cache._expire_info)
+        user.role = 'user'
+        user.save()
+        cache._cache.clear()
+        cache._cache.update(snapshot[0])
+        cache._expire_info.clear()
+        cache._expire_info.update(snapshot[1])
+        assert client.get('/api/v1/genres/').status_code == 401, (
+            'Проверьте, что отзыв токена в одном процессе сразу виден '
+            'в остальных, несмотря на их локальный кеш'
+        )
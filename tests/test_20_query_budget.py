@@ -0,0 +1,142 @@
+import pytest
+from django.urls import get_resolver
+
+from api.otp import issue_code
+from api.urls import QUERY_BUDGETS, WORST_CASE_QUERIES
+
+from .common import auth_client, count_queries, create_comments
+
+
+def route_names(resolver=None):
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            if getattr(pattern, 'app_name', None) != 'admin':
+                yield from route_names(pattern)
+        elif pattern.name:
+            yield pattern.name
+
+
+def requests_plan(titles, reviews, comments, user, token):
+    title = f'/api/v1/titles/{titles[0]["id"]}/'
+    review = f'{title}reviews/{reviews[0]["id"]}/'
+    comment = f'{review}comments/{comments[0]["id"]}/'
+    return [
+        ('api-root', 'GET', '/api/v1/', None),
+        ('token_obtain_pair', 'POST', '/api/v1/auth/token/',
+         {'email': user.email, 'confirmation_code': '1234'}),
+        ('get_otp', 'POST', '/api/auth/email/', {'email': user.email}),
+        ('token_refresh', 'POST', '/api/v1/auth/token/refresh/',
+         {'refresh': token['refresh']}),
+        ('api_token_auth', 'POST', '/api/v1/api-token-auth/', {}),
+        ('autocomplete', 'GET', '/api/v1/autocomplete/', {'q': 'по'}),
+        ('export', 'GET', '/api/v1/export/', None),
+        ('Users-list', 'GET', '/api/v1/users/', None),
+        ('Users-list', 'POST', '/api/v1/users/',
+         {'username': 'budget', 'email': 'budget@yamdb.fake'}),
+        ('Users-detail', 'GET', f'/api/v1/users/{user.username}/', None),
+        ('Users-detail', 'PATCH', f'/api/v1/users/{user.username}/',
+         {'bio': 'bio'}),
+        ('Users-detail', 'PATCH', '/api/v1/users/budget/',
+         {'role': 'moderator'}),
+        ('Users-detail', 'DELETE', '/api/v1/users/budget/', None),
+        ('Users-me', 'GET', '/api/v1/users/me/', None),
+        ('Users-me', 'PATCH', '/api/v1/users/me/', {'bio': 'bio'}),
+        ('category-list', 'GET', '/api/v1/categories/', None),
+        ('category-list', 'POST', '/api/v1/categories/',
+         {'name': 'Игры', 'slug': 'games'}),
+        ('category-detail', 'DELETE', '/api/v1/categories/games/', None),
+        ('genre-list', 'GET', '/api/v1/genres/', None),
+        ('genre-list', 'POST', '/api/v1/genres/',
+         {'name': 'Мюзикл', 'slug': 'musical'}),
+        ('genre-detail', 'DELETE', '/api/v1/genres/musical/', None),
+        ('titles-list', 'GET', '/api/v1/titles/', None),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'genre': 'drama,comedy', 'genre_match': 'all', 'category': 'films',
+          'year': 2000, 'name': 'а', 'facets': 'genre,category,year'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'category': 'films', 'name': 'а', 'ordering': '-rating',
+          'facets': 'genre,category,year'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'stream': 1, 'facets': 'genre,category,year'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'search': 'поворот', 'facets': 'genre,category,year'}),
+        ('titles-list', 'POST', '/api/v1/titles/',
+         {'name': 'Бюджет', 'year': 2001, 'genre': ['drama', 'comedy'],
+          'category': 'films', 'description': 'описание'}),
+        ('titles-detail', 'GET', title, None),
+        ('titles-top', 'GET', '/api/v1/titles/top/', None),
+        ('titles-detail', 'PATCH', title, {'description': 'описание'}),
+        ('titles-detail', 'PATCH', title,
+         {'genre': ['comedy'], 'category': 'books'}),
+        ('titles-detail', 'PUT', title,
+         {'name': 'Заново', 'year': 1999, 'genre': ['drama', 'comedy'],
+          'category': 'films', 'description': 'описание'}),
+        ('reviews-list', 'GET', f'{title}reviews/', None),
+        ('reviews-detail', 'GET', review, None),
+        ('reviews-detail', 'PATCH', review, {'text': 'новый текст'}),
+        ('reviews-detail', 'PATCH', review, {'text': 'оценка', 'score': 1}),
+        ('comments-list', 'GET', f'{review}comments/', None),
+        ('comments-list', 'POST', f'{review}comments/', {'text': 'ещё'}),
+        ('comments-detail', 'GET', comment, None),
+        ('comments-detail', 'PATCH', comment, {'text': 'правка'}),
+        ('comments-detail', 'DELETE', comment, None),
+        ('reviews-detail', 'DELETE', review, None),
+        ('titles-detail', 'DELETE', title, None),
+    ]
+
+
+def budget_for(name, method, budgets=QUERY_BUDGETS):
+    budget = budgets[name]
+    if isinstance(budget, dict):
+        budget = budget.get(method, budget.get('default'))
+    return budget
+
+
+class Test20QueryBudget:
+
+    def test_01_every_route_has_budget(self):
+        missing = set(route_names()) - set(QUERY_BUDGETS) - {'redoc'}
+        assert not missing, f'Задайте бюджет запросов для {missing}'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_routes_within_budget(self, user_client, admin, token):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin)
+        issue_code(user, '1234')
+        counts = {}
+        for name, method, url, data in requests_plan(
+                titles, reviews, comments, user, token):
+            response, count = count_queries(user_client, method, url, data)
+            assert response.status_code < 500, (name, method)
+            counts[name, method] = max(count, counts.get((name, method), 0))
+        over = {key: count for key, count in counts.items()
+                if count > budget_for(*key, WORST_CASE_QUERIES)}
+        assert not over, (
+            f'Обновите WORST_CASE_QUERIES, если рост оправдан: {over}'
+        )
+
+        response, count = count_queries(
+            auth_client(moderator), 'POST',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            {'text': 'текст', 'score': 5})
+        assert response.status_code == 201
+        assert count <= budget_for('reviews-list', 'POST',
+                                   WORST_CASE_QUERIES), (
+            f'Превышен бюджет запросов на создание отзыва: {count}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_debug_headers(self, client, settings):
+        # Строки версий создаёт миграция; после очистки базы тестом их
+        # восстанавливает первый запрос.
+        client.get('/api/v1/genres/')
+        settings.DEBUG = True
+        response = client.get('/api/v1/genres/')
+        budget = budget_for('genre-list', 'GET')
+        assert response['X-DB-Query-Budget'] == str(budget)
+        assert int(response['X-DB-Query-Count']) <= budget
+        assert 'X-DB-Time-Ms' in response
+
+        settings.DEBUG = False
+        assert 'X-DB-Query-Count' not in client.get('/api/v1/genres/')
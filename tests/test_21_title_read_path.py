@@ -0,0 +1,48 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Title
+from api.serializers import TitleSerializer, represent_titles, title_values
+
+from .common import create_reviews
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class Test21TitleReadPath:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_byte_identical(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.create(name='Без категории', description='')
+        queryset = Title.objects.order_by('pk')
+        expected = render(TitleSerializer(
+            queryset.select_related('category').prefetch_related('genre'),
+            many=True
+        ).data)
+        assert render(represent_titles(title_values(queryset))) == expected, (
+            'Проверьте, что быстрый путь даёт тот же JSON, что '
+            'TitleSerializer'
+        )
+
+        response = user_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert render(response.json()['results']) == expected
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        response = user_client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.content == render(TitleSerializer(title).data)
+        assert user_client.get('/api/v1/titles/0/').status_code == 404
+        assert user_client.get('/api/v1/titles/abc/').status_code == 404, (
+            'Проверьте, что нечисловой id произведения даёт 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genre_lookup_queries(self, user_client, admin,
+                                     django_assert_max_num_queries):
+        create_reviews(user_client, admin)
+        rows = list(title_values(Title.objects.all()))
+        with django_assert_max_num_queries(1):
+            represent_titles(rows)
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+def get_with_queries(client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return response.json(), [query['sql'] for query in
+                             context.captured_queries]
+
+
+class Test22SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        data, queries = get_with_queries(user_client, '/api/v1/titles/',
+                                         {'fields': 'rating,name,id'})
+        result = data['results'][0]
+        assert list(result) == ['id', 'rating', 'name'], (
+            'Проверьте, что ?fields= оставляет только запрошенные поля '
+            'в порядке сериализатора'
+        )
+        assert result['rating'] == 4.0
+        assert not any('api_title_genre' in sql or 'api_category' in sql
+                       or 'description' in sql for sql in queries), (
+            'Проверьте, что незапрошенные жанры, категория и описание '
+            'не выбираются из базы'
+        )
+
+        title_id = titles[0]['id']
+        data, _ = get_with_queries(user_client, f'/api/v1/titles/{title_id}/',
+                                   {'fields': 'genre'})
+        assert data == {'genre': [{'name': 'Комедия', 'slug': 'comedy'},
+                                  {'name': 'Ужасы', 'slug': 'horror'}]}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments(self, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = get_with_queries(user_client, url,
+                                         {'fields': 'id,score'})
+        assert all(list(result) == ['id', 'score']
+                   for result in data['results'])
+        assert not any('api_customuser' in sql and 'api_review' in sql
+                       or '"api_review"."text"' in sql for sql in queries), (
+            'Проверьте, что без author и text нет join и колонки text'
+        )
+
+        data, _ = get_with_queries(
+            user_client, f'{url}{reviews[0]["id"]}/comments/',
+            {'fields': 'author,text', 'pagination': 'cursor'})
+        assert {(result['author'], result['text'])
+                for result in data['results']} == {
+            (comment['author'], comment['text']) for comment in comments}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_field(self, user_client):
+        response = user_client.get('/api/v1/titles/',
+                                   {'fields': 'name,password'})
+        assert response.status_code == 400
+        assert 'password' in str(response.json()['fields'])
@@ -0,0 +1,65 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+
+from .common import create_reviews
+
+DATA = {
+    'text': 'Юникод, кавычки " и разделитель   строк',
+    'number': Decimal('1.50'),
+    'date': datetime.datetime(2021, 5, 1, 12, 30,
+                              tzinfo=datetime.timezone.utc),
+    'items': [1, 2.5, None, True, {'nested': []}],
+}
+
+
+def streamed(response):
+    assert response.streaming, 'Проверьте, что ?stream=1 отдаёт поток'
+    return b''.join(response.streaming_content)
+
+
+class Test23RendererStreaming:
+
+    @pytest.mark.parametrize('has_orjson', [True, False])
+    def test_01_renderer_matches_drf(self, monkeypatch, has_orjson):
+        if has_orjson:
+            pytest.importorskip('orjson')
+        else:
+            monkeypatch.setattr(renderers, 'orjson', None)
+        expected = JSONRenderer().render(DATA)
+        assert renderers.FastJSONRenderer().render(DATA) == expected
+        assert renderers.dumps(DATA) == expected
+        assert renderers.FastJSONRenderer().render(
+            DATA, 'application/json; indent=2'
+        ) == JSONRenderer().render(DATA, 'application/json; indent=2')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_streaming_matches_page(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url, params in (
+            ('/api/v1/titles/', {'limit': 1, 'offset': 1}),
+            ('/api/v1/titles/', {'fields': 'id,genre'}),
+            ('/api/v1/titles/', {'limit': 1, 'facets': 'genre,year'}),
+            (reviews_url, {'limit': 2}),
+            (reviews_url, {}),
+        ):
+            expected = user_client.get(url, params).content
+            content = streamed(user_client.get(url, {**params, 'stream': 1}))
+            # Ссылки next/previous сохраняют режим потока.
+            assert content.replace(b'&stream=1', b'') == expected, (
+                url, params)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cursor_not_streamed(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        response = user_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            {'stream': 1, 'pagination': 'cursor'})
+        assert response.status_code == 200
+        assert not response.streaming
+        assert len(response.json()['results']) == 3
@@ -0,0 +1,131 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Category, Genre
+
+from .common import auth_client, create_comments
+
+URL = '/api/v1/export/'
+
+
+def read(response):
+    assert response.status_code == 200, response.content
+    content = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class Test24Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export(self, user_client, admin):
+        comments, reviews, titles, user, _ = create_comments(user_client,
+                                                             admin)
+        assert APIClient().get(URL).status_code == 401
+        assert auth_client(user).get(URL).status_code == 403
+
+        response = user_client.get(URL)
+        assert response['Content-Type'] == 'application/x-ndjson'
+        records = read(response)
+        assert [record['type'] for record in records] == (
+            ['title'] * len(titles) + ['review'] * len(reviews)
+            + ['comment'] * len(comments)
+        )
+        title = records[0]
+        assert title['id'] == titles[0]['id']
+        assert title['rating'] == 4.0
+        assert title['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert [genre['slug'] for genre in title['genre']] == [
+            'comedy', 'horror']
+        review = records[len(titles)]
+        assert review['author'] == admin.username
+        assert review['title'] == titles[0]['id']
+        assert isinstance(review['pub_date'], str)
+
+        gzipped = user_client.get(URL, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert gzipped['Content-Encoding'] == 'gzip'
+        assert read(gzipped) == records
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_updated_since(self, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client,
+                                                          admin)
+        watermark = user_client.get(URL)['X-Export-Watermark']
+        comment_url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                       f'{reviews[0]["id"]}/comments/{comments[0]["id"]}/')
+        user_client.patch(comment_url, {'text': 'исправлено'})
+
+        records = read(user_client.get(URL, {'updated_since': watermark}))
+        assert [(record['type'], record['id']) for record in records] == [
+            ('comment', comments[0]['id'])], (
+            'Проверьте, что updated_since отдаёт только изменённые записи'
+        )
+        assert records[0]['text'] == 'исправлено'
+        assert user_client.get(
+            URL, {'updated_since': 'вчера'}).status_code == 400
+
+        today = timezone.localdate()
+        records = read(user_client.get(
+            URL, {'updated_since': today.isoformat()}))
+        assert len(records) == len(titles) + len(reviews) + len(comments), (
+            'Проверьте, что дата без времени означает полночь этого дня'
+        )
+        tomorrow = today + timedelta(days=1)
+        assert read(user_client.get(
+            URL, {'updated_since': tomorrow.isoformat()})) == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_command(self, user_client, admin, tmp_path):
+        create_comments(user_client, admin)
+        expected = read(user_client.get(URL))
+
+        output = tmp_path / 'catalog.ndjson.gz'
+        out = StringIO()
+        call_command('export_catalog', f'--output={output}', '--gzip',
+                     '--chunk-size=2', stdout=out)
+        assert 'Отметка для следующей выгрузки' in out.getvalue()
+        lines = gzip.decompress(output.read_bytes()).splitlines()
+        assert [json.loads(line) for line in lines] == expected
+
+        out = StringIO()
+        call_command('export_catalog', stdout=out, stderr=StringIO())
+        assert [json.loads(line) for line
+                in out.getvalue().splitlines()] == expected
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_nested_changes(self, user_client, admin):
+        _, _, titles, _, _ = create_comments(user_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+
+        def changed_titles():
+            records = read(user_client.get(URL, {'updated_since': mark}))
+            return {record['id'] for record in records
+                    if record['type'] == 'title'}
+
+        mark = user_client.get(URL)['X-Export-Watermark']
+        category = Category.objects.get(slug='films')
+        category.name = 'Кино'
+        category.save()
+        assert changed_titles() == {first}, (
+            'Проверьте, что переименование категории попадает в updated_since'
+        )
+
+        mark = user_client.get(URL)['X-Export-Watermark']
+        Genre.objects.get(slug='horror').titles.remove(first)
+        assert changed_titles() == {first}
+
+        mark = user_client.get(URL)['X-Export-Watermark']
+        Genre.objects.get(slug='drama').delete()
+        assert changed_titles() == {second}
+
+        mark = user_client.get(URL)['X-Export-Watermark']
+        category.delete()
+        assert changed_titles() == {first}
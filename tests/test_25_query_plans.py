@@ -0,0 +1,165 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.filters import TitleFilter
+from api.otp import issue_code
+
+from .common import create_comments
+from .test_20_query_budget import requests_plan
+
+# Допустимые сортировки во временном B-дереве: (регулярка по SQL, почему).
+# Выборки списка без индекса здесь не исключаются, а перечислены
+# в TitleFilter.unindexed_params() и UNINDEXED_REQUESTS.
+ALLOWED_SORTS = (
+    (r'"api_title_genre"\."title_id" (= \d+|IN \([\d, ]+\)) '
+     r'ORDER BY "api_genre"\."name"',
+     'жанры одного произведения при записи — несколько строк'),
+    (r'^SELECT .* WHERE "api_comment"\."review_id" IN \(',
+     'каскадное удаление собирает комментарии нескольких отзывов'),
+    (r'^SELECT .* WHERE "api_(review|comment)"\."author_id" IN \(',
+     'удаление пользователя собирает его отзывы и комментарии'),
+    (r'"api_genre"\."slug" IN \([^)]*\) ORDER BY "api_genre"\."name"',
+     'жанры из тела запроса при записи — несколько строк'),
+    (r'COUNT\([^)]*\) AS "count" FROM .* GROUP BY ',
+     'фасеты группируют найденное — по строке на жанр, категорию, год'),
+    (r'bm25\(api_title_fts',
+     'сортировка найденного по релевантности'),
+)
+
+
+def allowed_sort(sql):
+    return any(re.search(pattern, sql) for pattern, _ in ALLOWED_SORTS)
+
+
+def extra_requests(titles, reviews):
+    title = titles[0]['id']
+    return [
+        ('titles-list', 'GET', '/api/v1/titles/', {'year': 2000}),
+        ('titles-list', 'GET', '/api/v1/titles/', {'genre': 'drama'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'genre': 'drama,comedy', 'category': 'films'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'genre': 'horror,comedy', 'genre_match': 'all'}),
+        ('titles-list', 'GET', '/api/v1/titles/', {'category': 'films'}),
+        ('titles-list', 'GET', '/api/v1/titles/', {'search': 'поворот'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'ordering': '-review_count'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'category': 'films', 'ordering': 'name'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'category': 'books', 'ordering': '-rating,year,-name'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'category': 'films', 'ordering': 'year',
+          'pagination': 'cursor'}),
+        ('titles-list', 'GET', '/api/v1/titles/',
+         {'name': 'о', 'ordering': '-rating'}),
+        ('reviews-list', 'GET', f'/api/v1/titles/{title}/reviews/',
+         {'pagination': 'cursor'}),
+        ('comments-list', 'GET',
+         f'/api/v1/titles/{title}/reviews/{reviews[0]["id"]}/comments/',
+         {'pagination': 'cursor'}),
+    ]
+
+
+# Выборки без индекса под порядок id (см. TitleFilter): проверяется,
+# что список честный — у каждой план действительно с сортировкой или
+# проходом таблицы.
+UNINDEXED_REQUESTS = (
+    {'year_min': 1990},
+    {'year_max': 2010},
+    {'year_min': 1990, 'year_max': 2010},
+    {'year_min': 1000, 'year_max': 3000},
+    {'category': 'films,books'},
+    {'category': 'films,books', 'pagination': 'cursor'},
+)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def request_problems(client, method, url, data):
+    """[(sql, шаги плана)] с проходом таблицы или сортировкой."""
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method.lower())(url, data=data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code < 500, (url, data, response.content)
+    problems = []
+    for query in context.captured_queries:
+        if not query['sql'].startswith('SELECT'):
+            continue
+        steps = plan_problems(query['sql'], explain(query['sql']))
+        if steps:
+            problems.append((query['sql'], steps))
+    return problems
+
+
+def plan_problems(sql, plan):
+    problems = []
+    for step in plan:
+        # Без WHERE полный проход ожидаем: это выборка всей коллекции
+        # с LIMIT или выгрузка.
+        if (step.startswith('SCAN') and ' WHERE ' in sql
+                and 'INDEX' not in step and 'VIRTUAL TABLE' not in step):
+            problems.append(step)
+        if 'TEMP B-TREE' in step and not allowed_sort(sql):
+            problems.append(step)
+    return problems
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite',
+                    reason='EXPLAIN QUERY PLAN есть только в SQLite')
+class Test25QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_scans_or_sorts(self, user_client, admin, token):
+        comments, reviews, titles, user, _ = create_comments(user_client,
+                                                             admin)
+        issue_code(user, '1234')
+        plan = requests_plan(titles, reviews, comments, user, token)
+        # Чтение — до удалений в конце плана.
+        plan[-3:-3] = extra_requests(titles, reviews)
+        problems = []
+        for name, method, url, data in plan:
+            assert not TitleFilter.unindexed_params(data or {}), data
+            problems += [(name, method, *problem) for problem in
+                         request_problems(user_client, method, url, data)]
+        assert not problems, (
+            'Полный проход таблицы или сортировка во временном B-дереве: '
+            f'{problems}'
+        )
+
+    @pytest.mark.django_db
+    def test_02_lookup_indexes(self):
+        assert 'INDEX' in ' '.join(explain(
+            'SELECT id FROM api_customuser WHERE username = \'u\''))
+        assert 'title_year_idx' in ' '.join(explain(
+            'SELECT id FROM api_title WHERE year = 2000 ORDER BY id'))
+        assert 'review_title_pub_date_idx' in ' '.join(explain(
+            'SELECT id FROM api_review WHERE title_id = 1 '
+            'ORDER BY pub_date DESC, id DESC LIMIT 10'))
+        assert 'comment_review_pub_date_idx' in ' '.join(explain(
+            'SELECT id FROM api_comment WHERE review_id = 1 '
+            'ORDER BY pub_date DESC, id DESC LIMIT 10'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unindexed_filters_are_documented(self, user_client, admin):
+        create_comments(user_client, admin)
+        for params in UNINDEXED_REQUESTS:
+            assert TitleFilter.unindexed_params(params), params
+            assert request_problems(user_client, 'GET', '/api/v1/titles/',
+                                    params), (
+                f'{params} читается по индексу: уберите выборку из '
+                'TitleFilter.unindexed_params() и UNINDEXED_REQUESTS'
+            )
+        for params in ({'year': 2000}, {'category': 'films'},
+                       {'genre': 'drama,comedy'}, {'name': 'по'}):
+            assert not TitleFilter.unindexed_params(params), params
@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from api.models import Category, Genre, Title
+
+from .common import create_titles
+
+URL = '/api/v1/titles/'
+
+
+def add_title(name, year, category, *genres):
+    title = Title.objects.create(
+        name=name, year=year, description='',
+        category=Category.objects.get(slug=category))
+    title.genre.set(Genre.objects.filter(slug__in=genres))
+    return title
+
+
+class Test26Facets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counts(self, user_client):
+        create_titles(user_client)
+        add_title('Драма в кино', 2000, 'films', 'drama')
+
+        response = user_client.get(URL, {'facets': 'year,genre,category'})
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 3 and len(data['results']) == 3
+        assert list(data['facets']) == ['genre', 'category', 'year']
+        assert data['facets']['genre'] == [
+            {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'horror', 'name': 'Ужасы', 'count': 1},
+        ]
+        assert data['facets']['category'] == [
+            {'slug': 'films', 'name': 'Фильм', 'count': 2},
+            {'slug': 'books', 'name': 'Книги', 'count': 1},
+        ]
+        assert data['facets']['year'] == [
+            {'value': 2020, 'count': 1}, {'value': 2000, 'count': 2},
+        ]
+        assert 'facets' not in user_client.get(URL).json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_selection(self, user_client):
+        create_titles(user_client)
+        add_title('Драма в кино', 2000, 'films', 'drama')
+
+        data = user_client.get(URL, {'genre': 'drama',
+                                     'facets': 'genre,category'}).json()
+        assert data['count'] == 2
+        assert [genre['count'] for genre in data['facets']['genre']] == [
+            2, 1, 1], 'Фасет не должен сужаться собственным фильтром'
+        assert data['facets']['category'] == [
+            {'slug': 'books', 'name': 'Книги', 'count': 1},
+            {'slug': 'films', 'name': 'Фильм', 'count': 1},
+        ]
+
+        data = user_client.get(URL, {'search': 'проект',
+                                     'facets': 'year'}).json()
+        assert data['facets']['year'] == [{'value': 2020, 'count': 1}]
+
+        add_title('Ещё драма', 2020, 'books', 'drama')
+        data = user_client.get(URL, {'genre': 'drama',
+                                     'facets': 'category'}).json()
+        assert data['facets']['category'][0] == {
+            'slug': 'books', 'name': 'Книги', 'count': 2
+        }, 'Проверьте, что счётчики обновляются после изменений'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_facet(self, user_client):
+        response = user_client.get(URL, {'facets': 'genre,author'})
+        assert response.status_code == 400
+        assert 'author' in str(response.json()['facets'])
+        response = user_client.get(URL, {'facets': 'bogus', 'stream': 1})
+        assert response.status_code == 400, (
+            'Проверьте, что фасеты проверяются и в потоковом режиме'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_search_with_genre_facet(self, user_client):
+        create_titles(user_client)
+        add_title('Драма в кино', 2000, 'films', 'drama')
+        params = {'search': 'кино', 'facets': 'genre,category'}
+        expected = {
+            'genre': [{'slug': 'drama', 'name': 'Драма', 'count': 1}],
+            'category': [{'slug': 'films', 'name': 'Фильм', 'count': 1}],
+        }
+
+        response = user_client.get(URL, params)
+        assert response.status_code == 200, (
+            'Проверьте, что поиск работает вместе с фасетом жанров'
+        )
+        data = response.json()
+        assert [title['name'] for title in data['results']] == [
+            'Драма в кино']
+        assert data['facets'] == expected
+
+        response = user_client.get(URL, {**params, 'stream': 1})
+        assert response.status_code == 200
+        data = json.loads(b''.join(response.streaming_content))
+        assert [title['name'] for title in data['results']] == [
+            'Драма в кино']
+        assert data['facets'] == expected
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_facet_drops_its_dimension(self, user_client):
+        create_titles(user_client)
+        add_title('Драма в кино', 2000, 'films', 'drama')
+
+        data = user_client.get(URL, {'year_min': 2010,
+                                     'facets': 'year'}).json()
+        assert data['count'] == 1
+        assert data['facets']['year'] == [
+            {'value': 2020, 'count': 1}, {'value': 2000, 'count': 2},
+        ], 'Фасет лет не должен сужаться year_min и year_max'
+        data = user_client.get(URL, {'year_max': 2010, 'year': 2000,
+                                     'facets': 'year'}).json()
+        assert len(data['facets']['year']) == 2
+
+        data = user_client.get(URL, {'genre': 'drama,comedy',
+                                     'genre_match': 'all',
+                                     'facets': 'genre'}).json()
+        assert data['count'] == 0
+        assert [genre['count'] for genre in data['facets']['genre']] == [
+            2, 1, 1], 'Фасет жанров не должен сужаться genre_match'
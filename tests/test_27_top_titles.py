@@ -0,0 +1,121 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from api import ranking
+from api.models import (Category, CustomUser, Genre, RankingPrior, Review,
+                        Title, TitleRanking)
+
+from .common import create_titles
+
+URL = '/api/v1/titles/top/'
+
+
+def add_reviews(title_id, *scores):
+    for score in scores:
+        number = CustomUser.objects.count()
+        author = CustomUser.objects.create(
+            username=f'critic{number}', email=f'critic{number}@yamdb.fake')
+        Review.objects.create(title_id=title_id, author=author, text='отзыв',
+                              score=score)
+
+
+def catalog(user_client):
+    """Одна десятка, двенадцать девяток и двадцать троек."""
+    titles, _, _ = create_titles(user_client)
+    third = Title.objects.create(
+        name='Середняк', year=2010, description='',
+        category=Category.objects.get(slug='films'))
+    third.genre.set(Genre.objects.filter(slug='drama'))
+    add_reviews(titles[0]['id'], 10)
+    add_reviews(titles[1]['id'], *[9] * 12)
+    add_reviews(third.pk, *[3] * 20)
+    call_command('rebuild_rankings', stdout=StringIO())
+    return titles[0]['id'], titles[1]['id'], third.pk
+
+
+def top_ids(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200, response.content
+    return [title['id'] for title in response.json()]
+
+
+class Test27TopTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bayesian_order(self, user_client, client):
+        single, popular, mediocre = catalog(user_client)
+        mean = (10 + 9 * 12 + 3 * 20) / 33
+        assert ranking.get_prior_mean() == pytest.approx(mean)
+
+        data = client.get(URL).json()
+        assert [title['id'] for title in data] == [popular, single, mediocre]
+        assert data[0]['score'] == round(
+            ranking.bayesian_score(9 * 12, 12, mean), 3)
+        assert data[0]['rating'] == 9.0
+        assert data[0]['genre'] == [{'name': 'Драма', 'slug': 'drama'}]
+        assert set(data[1]) == {'id', 'name', 'year', 'description', 'genre',
+                                'category', 'rating', 'review_count',
+                                'score'}
+        assert client.get(URL, {'fields': 'id,name'}).json()[0] == {
+            'id': popular, 'name': 'Проект', 'score': data[0]['score']}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_filters(self, user_client, client):
+        single, popular, mediocre = catalog(user_client)
+        assert top_ids(client, genre='drama') == [popular, mediocre]
+        assert top_ids(client, category='films') == [single, mediocre]
+        assert top_ids(client, year_from=2005) == [popular, mediocre]
+        assert top_ids(client, year_to=2010) == [single, mediocre]
+        assert top_ids(client, genre='horror', year_to=2000) == [single]
+        assert top_ids(client, limit=1) == [popular]
+        assert top_ids(client, genre='unknown') == []
+        for params in ({'limit': 0}, {'limit': 101}, {'year_from': 'год'}):
+            assert client.get(URL, params).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_incremental_refresh(self, user_client, client):
+        single, popular, mediocre = catalog(user_client)
+        mean = ranking.get_prior_mean()
+        add_reviews(single, *[10] * 20)
+        assert top_ids(client, limit=1) == [single]
+        assert TitleRanking.objects.get(pk=single).score == pytest.approx(
+            ranking.bayesian_score(210, 21, mean))
+
+        Review.objects.filter(title_id=popular).delete()
+        assert not TitleRanking.objects.filter(pk=popular).exists()
+        assert top_ids(client) == [single, mediocre]
+
+        Title.objects.filter(pk=mediocre).update(year=1990)
+        Title.objects.get(pk=mediocre).save()
+        assert TitleRanking.objects.get(pk=mediocre).year == 1990
+
+        Title.objects.get(pk=single).delete()
+        assert top_ids(client) == [mediocre]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rebuild_command(self, user_client):
+        single, popular, mediocre = catalog(user_client)
+        TitleRanking.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_rankings', stdout=out)
+        assert 'В рейтинге произведений: 3' in out.getvalue()
+        assert list(TitleRanking.objects.order_by('-score').values_list(
+            'pk', flat=True)) == [popular, single, mediocre]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_prior_mean_in_database(self, user_client):
+        single, _, _ = catalog(user_client)
+        mean = (10 + 9 * 12 + 3 * 20) / 33
+        cache.clear()
+        assert RankingPrior.objects.get().mean == pytest.approx(mean), (
+            'Проверьте, что rebuild_rankings сохраняет C в базе'
+        )
+
+        # C, записанный другим процессом, подхватывается без кеша.
+        RankingPrior.objects.update(mean=5.0)
+        add_reviews(single, 10)
+        assert TitleRanking.objects.get(pk=single).score == pytest.approx(
+            ranking.bayesian_score(20, 2, 5.0))
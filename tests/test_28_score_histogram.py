@@ -0,0 +1,94 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import SCORE_FIELDS, Review, Title
+
+from .common import count_queries, create_reviews
+
+URL = '/api/v1/titles/'
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+class Test28ScoreHistogram:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counters(self, user_client, admin):
+        reviews, titles, user, _ = create_reviews(user_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.score_histogram == {3: 1, 4: 1, 5: 1, **{
+            score: 0 for score in (1, 2, 6, 7, 8, 9, 10)}}
+
+        review = Review.objects.get(pk=reviews[1]['id'])
+        review.score = 9
+        review.save()
+        title.refresh_from_db()
+        assert (title.score_3_count, title.score_9_count) == (0, 1), (
+            'Проверьте, что при изменении оценки счётчики переносятся'
+        )
+        review.title_id = titles[1]['id']
+        review.save()
+        title.refresh_from_db()
+        assert title.score_9_count == 0
+        assert Title.objects.get(pk=titles[1]['id']).score_9_count == 1
+
+        response = user_client.delete(
+            f'{URL}{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert title.score_5_count == 0 and title.score_4_count == 1
+        user.delete()
+        assert Title.objects.get(pk=titles[1]['id']).score_9_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_optional_field(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        title_url = f'{URL}{titles[0]["id"]}/'
+        assert 'score_histogram' not in user_client.get(title_url).json()
+        assert 'score_histogram' not in (
+            user_client.get(URL).json()['results'][0])
+
+        params = {'fields': 'id,score_histogram'}
+        assert user_client.get(title_url, params).json() == {
+            'id': titles[0]['id'], 'score_histogram': histogram(s3=1, s4=1,
+                                                                s5=1)}
+        results = user_client.get(URL, params).json()['results']
+        assert results[1]['score_histogram'] == histogram()
+
+        data = user_client.get(
+            title_url, {'fields': 'name,score_histogram,rating'}).json()
+        assert list(data) == ['rating', 'score_histogram', 'name']
+        response = user_client.patch(title_url, {'description': 'новое'})
+        assert 'score_histogram' not in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_no_extra_queries(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        for url in (URL, f'{URL}{titles[0]["id"]}/'):
+            _, plain = count_queries(user_client, 'GET', url,
+                                     {'fields': 'id,name'})
+            _, with_histogram = count_queries(
+                user_client, 'GET', url, {'fields': 'id,name,score_histogram'})
+            assert with_histogram == plain
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rebuild_command(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.update(**dict.fromkeys(SCORE_FIELDS, 7))
+        out = StringIO()
+        call_command('rebuild_score_histograms', '--dry-run', stdout=out)
+        assert 'Расхождений: 2' in out.getvalue()
+        assert Title.objects.get(pk=titles[0]['id']).score_5_count == 7
+
+        call_command('rebuild_score_histograms', stdout=StringIO())
+        assert Title.objects.get(pk=titles[0]['id']).score_histogram == {
+            score: int(score in (3, 4, 5)) for score in range(1, 11)}
+        assert not any(Title.objects.get(
+            pk=titles[1]['id']).score_histogram.values())
+        out = StringIO()
+        call_command('rebuild_score_histograms', stdout=out)
+        assert 'Расхождений: 0' in out.getvalue()
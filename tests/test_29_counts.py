@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Review
+
+from .common import create_comments
+
+URL = '/api/v1/titles/'
+
+
+class Test29Counts:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_inline_counts(self, user_client, admin):
+        comments, reviews, titles, user, _ = create_comments(user_client,
+                                                             admin)
+        title_url = f'{URL}{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        assert user_client.get(title_url).json()['review_count'] == 3
+        results = user_client.get(URL).json()['results']
+        assert [title['review_count'] for title in results] == [3, 0]
+        assert user_client.get(review_url).json()['comment_count'] == 3
+        results = user_client.get(f'{title_url}reviews/').json()['results']
+        assert sorted(review['comment_count'] for review in results) == [
+            0, 0, 3]
+
+        response = user_client.delete(
+            f'{review_url}comments/{comments[0]["id"]}/')
+        assert response.status_code == 204
+        assert user_client.get(review_url).json()['comment_count'] == 2, (
+            'Проверьте, что удаление комментария уменьшает comment_count'
+        )
+        user.delete()
+        assert user_client.get(review_url).json()['comment_count'] == 1, (
+            'Проверьте, что каскадное удаление комментариев учитывается'
+        )
+        assert user_client.get(title_url).json()['review_count'] == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering(self, user_client, admin):
+        _, _, titles, _, _ = create_comments(user_client, admin)
+        ids = [title['id'] for title in titles]
+
+        def ordered(value):
+            response = user_client.get(URL, {'ordering': value})
+            assert response.status_code == 200, response.content
+            return [title['id'] for title in response.json()['results']]
+
+        assert ordered('-review_count') == ids
+        assert ordered('review_count') == ids[::-1]
+        assert user_client.get(URL, {'ordering': '-review_count',
+                                     'limit': 1}).json()['count'] == 2
+        for value in ('rating_count', 'review_count,name', '-id'):
+            response = user_client.get(URL, {'ordering': value})
+            assert response.status_code == 400, value
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_recalc(self, user_client, admin):
+        _, reviews, _, _, _ = create_comments(user_client, admin)
+        Review.objects.update(comment_count=5)
+        out = StringIO()
+        call_command('recalc_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений: 3' in out.getvalue()
+        call_command('recalc_ratings', stdout=StringIO())
+        assert dict(Review.objects.values_list('pk', 'comment_count')) == {
+            reviews[0]['id']: 3, reviews[1]['id']: 0, reviews[2]['id']: 0}
@@ -0,0 +1,199 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.filters import TitleOrderingFilter
+from api.models import Category, CustomUser, Review, Title
+
+from .common import make_cursor
+from .test_25_query_plans import explain, plan_problems
+
+URL = '/api/v1/titles/'
+ORDERINGS = ('name', 'rating', 'review_count', 'year', 'rating,-year,name')
+
+
+def reverse(ordering):
+    return ','.join(term[1:] if term.startswith('-') else '-' + term
+                    for term in ordering.split(','))
+
+
+def catalog():
+    """Произведения с совпадающими оценками, годами и без отзывов."""
+    category = Category.objects.create(name='Фильм', slug='films')
+    rows = [('Бета', 2000, [8, 6]), ('Альфа', 2000, [7]),
+            ('Гамма', None, [7]), ('Альфа', 1990, []), ('Дельта', 2010, [10]),
+            ('Бета', 1990, [7, 7, 7]), ('Ёж', None, [])]
+    users = [CustomUser.objects.create(username=f'u{number}',
+                                       email=f'u{number}@yamdb.fake')
+             for number in range(3)]
+    for name, year, scores in rows:
+        title = Title.objects.create(name=name, year=year, description='',
+                                     category=category)
+        for user, score in zip(users, scores):
+            Review.objects.create(title=title, author=user, text='отзыв',
+                                  score=score)
+
+
+def expected_ids(ordering):
+    """Тот же порядок в Python: NULL меньше любого значения, затем id."""
+    columns = [(term.lstrip('-'), term.startswith('-'))
+               for term in ordering.split(',')]
+    titles = list(Title.objects.all())
+    for name, descending in reversed([*columns, ('id', columns[-1][1])]):
+        attribute = {'review_count': 'rating_count',
+                     'rating': 'rating_avg'}.get(name, name)
+        titles.sort(key=lambda title: (
+            getattr(title, attribute) is not None,
+            getattr(title, attribute) or 0), reverse=descending)
+    return [title.pk for title in titles]
+
+
+def walk(client, params):
+    """id всех страниц курсора по ссылкам next."""
+    ids, url, params = [], URL, {**params, 'pagination': 'cursor',
+                                 'limit': 2}
+    while url:
+        response = client.get(url, params)
+        assert response.status_code == 200, response.content
+        data = response.json()
+        ids += [title['id'] for title in data['results']]
+        url, params = data['next'], None
+    return ids
+
+
+class Test30TitleOrdering:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_column(self):
+        catalog()
+        for title in Title.objects.all():
+            assert title.rating_avg == title.rating
+        review = Review.objects.filter(title__name='Дельта').get()
+        review.score = 4
+        review.save()
+        review.delete()
+        assert Title.objects.get(name='Дельта').rating_avg is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering(self, client):
+        catalog()
+        for ordering in ORDERINGS:
+            for value in (ordering, reverse(ordering)):
+                response = client.get(URL, {'ordering': value})
+                assert response.status_code == 200, response.content
+                assert [title['id'] for title in response.json()[
+                    'results']] == expected_ids(value), value
+        for value in ('rating,year', 'year,rating', 'id', 'description',
+                      'rating,-year,-name'):
+            response = client.get(URL, {'ordering': value})
+            assert response.status_code == 400, value
+            assert 'ordering' in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cursor(self, client):
+        catalog()
+        assert walk(client, {}) == sorted(
+            Title.objects.values_list('pk', flat=True))
+        for ordering in ORDERINGS:
+            for value in (ordering, reverse(ordering)):
+                assert walk(client, {'ordering': value}) == expected_ids(
+                    value), value
+
+        first = client.get(URL, {'ordering': 'rating', 'pagination': 'cursor',
+                                 'limit': 3}).json()
+        second = client.get(first['next']).json()
+        assert second['previous'] is not None
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results']
+        assert 'count' not in second
+        assert parse_qs(urlparse(first['next']).query)['ordering'] == [
+            'rating']
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='EXPLAIN QUERY PLAN есть только в SQLite')
+    @pytest.mark.django_db(transaction=True)
+    def test_04_index_plans(self, client):
+        catalog()
+        problems = []
+        for ordering in ORDERINGS:
+            for value in (ordering, reverse(ordering)):
+                first = client.get(URL, {'ordering': value,
+                                         'pagination': 'cursor', 'limit': 2})
+                with CaptureQueriesContext(connection) as context:
+                    client.get(URL, {'ordering': value})
+                    client.get(first.json()['next'])
+                for query in context.captured_queries:
+                    sql = query['sql']
+                    if 'FROM "api_title"' not in sql or 'COUNT' in sql:
+                        continue
+                    steps = plan_problems(sql, explain(sql))
+                    if steps or 'INDEX' not in ' '.join(explain(sql)):
+                        problems.append((value, sql, steps))
+        assert not problems, problems
+
+    def test_05_every_ordering_has_index(self):
+        indexes = {tuple(index.fields) for index in Title._meta.indexes}
+        # Индекс по одной колонке в SQLite неявно заканчивается на rowid.
+        indexes |= {(*fields, 'id') for fields in indexes}
+        for ordering in TitleOrderingFilter.orderings:
+            columns = [
+                ('-' if term.startswith('-') else '')
+                + TitleOrderingFilter.ordering_fields[term.lstrip('-')]
+                for term in ordering
+            ]
+            assert (*columns, 'id') in indexes, ordering
+            assert ('category', *columns, 'id') in indexes, ordering
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_invalid_cursor_and_search(self, client):
+        catalog()
+        for ordering, position in (('rating', ['xx', 1]),
+                                   ('rating', [7.0, 'id']),
+                                   ('-year', [[2000], 1]),
+                                   ('review_count', [None, 1]),
+                                   ('rating,-year,name', [7.0, 'год', 'a'])):
+            response = client.get(URL, {'ordering': ordering,
+                                        'cursor': make_cursor(*position)})
+            assert response.status_code == 404, (ordering, position)
+        response = client.get(URL, {'ordering': 'rating',
+                                    'cursor': make_cursor(None, 1)})
+        assert response.status_code == 200
+
+        response = client.get(URL, {'search': 'альфа',
+                                    'pagination': 'cursor'})
+        assert response.status_code == 400, (
+            'Проверьте, что курсор с поиском без ordering отклоняется'
+        )
+        assert 'pagination' in response.json()
+        assert client.get(URL, {'search': 'альфа', 'ordering': 'name',
+                                'pagination': 'cursor'}).status_code == 400
+        assert client.get(URL, {'search': 'альфа'}).status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_filtered_ordering(self, client):
+        catalog()
+        books = Category.objects.create(name='Книги', slug='books')
+        Title.objects.create(name='Аз', year=1800, description='',
+                             category=books)
+        films = list(Title.objects.filter(category__slug='films').values_list(
+            'pk', flat=True))
+        for ordering in ORDERINGS:
+            for value in (ordering, reverse(ordering)):
+                response = client.get(URL, {'ordering': value,
+                                            'category': 'films'})
+                assert response.status_code == 200, response.content
+                assert [title['id'] for title in response.json()[
+                    'results']] == [pk for pk in expected_ids(value)
+                                    if pk in films], value
+        assert client.get(URL, {'ordering': 'name',
+                                'name': 'альфа'}).status_code == 200
+
+        for params in ({'genre': 'drama'}, {'search': 'альфа'},
+                       {'year': 2000}, {'year_min': 1990},
+                       {'year_max': 2000}, {'category': 'films,books'}):
+            response = client.get(URL, {**params, 'ordering': 'name'})
+            assert response.status_code == 400, params
+            assert 'ordering' in response.json(), params
+            assert client.get(URL, params).status_code == 200, params
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Genre, Title
+
+from .common import create_titles
+
+URL = '/api/v1/titles/'
+
+
+def catalog(user_client):
+    """Добавляет к create_titles фильм-драмокомедию 2010 года и
+    произведение 1990 года без жанров и категории."""
+    titles, _, _ = create_titles(user_client)
+    both = Title.objects.create(
+        name='Драма в кино', year=2010, description='',
+        category=Category.objects.get(slug='films'))
+    both.genre.set(Genre.objects.filter(slug__in=['drama', 'comedy']))
+    bare = Title.objects.create(name='Без жанра', year=1990, description='')
+    return titles[0]['id'], titles[1]['id'], both.pk, bare.pk
+
+
+def found(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200, response.content
+    data = response.json()
+    ids = [title['id'] for title in data['results']]
+    assert data['count'] == len(ids) == len(set(ids)), (
+        'Проверьте, что фильтры не дублируют произведения'
+    )
+    return set(ids)
+
+
+class Test31TitleFilters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_year_range(self, user_client):
+        turn, project, both, bare = catalog(user_client)
+        assert found(user_client, year_min=2000) == {turn, project, both}
+        assert found(user_client, year_max=2010) == {turn, both, bare}
+        assert found(user_client, year_min=2000, year_max=2010) == {
+            turn, both}
+        assert found(user_client, year_min=2011, year_max=2010) == set()
+        assert found(user_client, year=2020) == {project}
+        assert user_client.get(URL, {'year_min': 'год'}).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genres(self, user_client):
+        turn, project, both, bare = catalog(user_client)
+        assert found(user_client, genre='drama') == {project, both}
+        assert found(user_client, genre='drama,comedy') == {
+            turn, project, both}
+        assert found(user_client, genre='drama,comedy',
+                     genre_match='any') == {turn, project, both}
+        assert found(user_client, genre='comedy,drama',
+                     genre_match='all') == {both}
+        assert found(user_client, genre='horror,drama',
+                     genre_match='all') == set()
+        assert found(user_client, genre='comedy,', genre_match='all') == {
+            turn, both}
+        assert found(user_client, genre_match='all') == {
+            turn, project, both, bare}
+        response = user_client.get(URL, {'genre': 'drama',
+                                         'genre_match': 'some'})
+        assert response.status_code == 400
+        assert 'genre_match' in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_categories(self, user_client):
+        turn, project, both, bare = catalog(user_client)
+        assert found(user_client, category='films') == {turn, both}
+        assert found(user_client, category='films,books') == {
+            turn, project, both}
+        assert found(user_client, category='films', genre='comedy,drama',
+                     genre_match='all', year_min=2005) == {both}
+
+        data = user_client.get(URL, {'genre': 'drama,comedy',
+                                     'category': 'films',
+                                     'facets': 'category'}).json()
+        assert data['facets']['category'] == [
+            {'slug': 'films', 'name': 'Фильм', 'count': 2},
+            {'slug': 'books', 'name': 'Книги', 'count': 1},
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_single_query(self, user_client):
+        catalog(user_client)
+        params = {'genre': 'drama,comedy', 'genre_match': 'all',
+                  'category': 'films,books', 'year_min': 1990}
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get(URL, params).status_code == 200
+        pages = [query['sql'] for query in context.captured_queries
+                 if query['sql'].startswith('SELECT "api_title"."id"')]
+        assert len(pages) == 1, 'Страница должна выбираться одним запросом'
+        sql = pages[0]
+        assert 'DISTINCT' not in sql
+        assert sql.count('"api_title"."id" IN (SELECT') == 2
+        assert 'JOIN "api_title_genre"' not in sql.split(' WHERE ')[0]